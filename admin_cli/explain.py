@@ -0,0 +1,98 @@
+"""
+SQL of querysets and plans of their execution given by database, used by
+``--explain``.
+"""
+from django.db import connections
+from django.db.models import sql
+from django.utils import six
+
+#: Statements explaining a query by database's vendor
+EXPLAIN_PREFIXES = {
+    'sqlite': 'EXPLAIN QUERY PLAN',
+    'postgresql': 'EXPLAIN',
+    'mysql': 'EXPLAIN',
+}
+#: Statements explaining a query with its execution
+ANALYZE_PREFIXES = {
+    'postgresql': 'EXPLAIN ANALYZE',
+    'mysql': 'EXPLAIN ANALYZE',
+}
+
+
+class ExplainError(ValueError):
+    """Database can't explain the query."""
+
+
+def get_sql(queryset):
+    """
+    Get the SQL of ``queryset`` with placeholders, and its parameters.
+    Parameters are kept apart as only database's driver quotes them.
+
+    :rtype: ``tuple``
+    """
+    return queryset.query.get_compiler(queryset.db).as_sql()
+
+
+def format_params(params):
+    """
+    Format parameters of SQL as Python literals, separated by commas.
+
+    :rtype: ``str``
+    """
+    return ', '.join([repr(param) for param in params])
+
+
+def get_aggregate_queryset(queryset, expressions):
+    """
+    Get a queryset selecting ``queryset.aggregate(**expressions)`` as one
+    row, which can be explained unlike the ``dict`` returned by
+    ``aggregate``.
+
+    :param expressions: Aggregates by name of column
+    :type expressions: ``dict``
+    """
+    queryset = queryset.order_by()
+    for alias, expression in expressions.items():
+        queryset.query.add_annotation(expression, alias)
+    queryset.query.default_cols = False
+    return queryset
+
+
+def get_update_sql(queryset, values):
+    """
+    Get the SQL of ``queryset.update(**values)``, without running it.
+
+    :param values: Values or expressions by field's name
+    :type values: ``dict``
+
+    :returns: SQL with placeholders and its parameters
+    :rtype: ``tuple``
+    """
+    query = queryset.query.clone(sql.UpdateQuery)
+    query.add_update_values(values)
+    return query.get_compiler(queryset.db).as_sql()
+
+
+def explain(queryset, analyze=False):
+    """
+    Get the plan of ``queryset`` given by database.
+
+    :param analyze: Run the query to get its actual costs
+    :type analyze: ``bool``
+
+    :rtype: ``str``
+
+    :raises ExplainError: If database can't explain the query
+    """
+    connection = connections[queryset.db]
+    prefixes = ANALYZE_PREFIXES if analyze else EXPLAIN_PREFIXES
+    if connection.vendor not in prefixes:
+        raise ExplainError("Can't explain%s queries with %s" % (
+            ' and analyze' if analyze else '', connection.vendor))
+    statement, params = get_sql(queryset)
+    with connection.cursor() as cursor:
+        cursor.execute('%s %s' % (prefixes[connection.vendor], statement),
+                       params)
+        rows = cursor.fetchall()
+    return '\n'.join([' '.join([six.text_type(value) for value in row])
+                      for row in rows])
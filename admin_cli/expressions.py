@@ -0,0 +1,138 @@
+"""
+Database expressions given as value of updated fields, for example
+``'F(field2)+1'`` or ``'Upper(name)'``.
+
+Values are parsed with :mod:`ast` and only a few nodes are allowed: numbers,
+strings, field names, arithmetic operators and calls of :data:`FUNCTIONS`.
+Nothing is evaluated by Python.
+"""
+import ast
+
+from django.db import models
+from django.db.models import F, Value, functions
+from django.utils import six
+from django.utils.timezone import now
+
+
+def _now():
+    # Now() function came with Django 1.9
+    return Value(now(), output_field=models.DateTimeField())
+
+
+FUNCTIONS = {
+    'F': F,
+    'Value': Value,
+    'Coalesce': functions.Coalesce,
+    'Concat': functions.Concat,
+    'Length': functions.Length,
+    'Lower': functions.Lower,
+    'Substr': functions.Substr,
+    'Upper': functions.Upper,
+    'Now': getattr(functions, 'Now', _now),
+}
+OPERATORS = {
+    ast.Add: lambda a, b: a + b,
+    ast.Sub: lambda a, b: a - b,
+    ast.Mult: lambda a, b: a * b,
+    ast.Div: lambda a, b: a / b,
+}
+# Literals are Constant nodes since Python 3.8, Num and Str before
+CONSTANT_NODE = getattr(ast, 'Constant', ())
+
+
+class ExpressionError(ValueError):
+    """Value looks like an expression but uses unsupported syntax."""
+
+
+def parse_value(value):
+    """
+    Get the database expression written in ``value``, or ``value`` itself
+    if it doesn't call any of :data:`FUNCTIONS`.
+
+    :param value: Value given for a field
+    :type value: ``str``
+
+    :returns: Expression or ``value``
+
+    :raises ExpressionError: If expression uses unsupported syntax
+    """
+    try:
+        tree = ast.parse(value.strip(), mode='eval')
+    except (SyntaxError, ValueError, TypeError):
+        return value
+    if not any([_is_function_call(node) for node in ast.walk(tree)]):
+        return value
+    return _compile(tree.body, in_call=False)
+
+
+def _is_function_call(node):
+    return isinstance(node, ast.Call) and \
+        isinstance(node.func, ast.Name) and node.func.id in FUNCTIONS
+
+
+def _get_literal(node):
+    """Get Python value of a number or string node, else raise KeyError."""
+    if isinstance(node, CONSTANT_NODE):
+        value = node.value
+    elif node.__class__.__name__ == 'Num':
+        value = node.n
+    elif node.__class__.__name__ == 'Str':
+        value = node.s
+    else:
+        raise KeyError(node)
+    if isinstance(value, bool) or \
+            not isinstance(value, six.string_types + six.integer_types +
+                           (float,)):
+        raise KeyError(node)
+    return value
+
+
+def _compile(node, in_call):
+    try:
+        value = _get_literal(node)
+    except KeyError:
+        pass
+    else:
+        # Strings given to functions are values, not field names
+        if in_call and isinstance(value, six.string_types):
+            return Value(value)
+        return value
+    if isinstance(node, ast.Name):
+        return F(node.id)
+    elif isinstance(node, ast.BinOp) and type(node.op) in OPERATORS:
+        return OPERATORS[type(node.op)](_compile(node.left, in_call),
+                                        _compile(node.right, in_call))
+    elif isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub):
+        value = _compile(node.operand, in_call=False)
+        if not isinstance(value, six.integer_types + (float,)):
+            raise ExpressionError("Only numbers can be negated")
+        return -value
+    elif _is_function_call(node):
+        if node.keywords or getattr(node, 'starargs', None) or \
+                getattr(node, 'kwargs', None):
+            raise ExpressionError("Keyword arguments aren't supported")
+        name = node.func.id
+        if name == 'F':
+            if len(node.args) != 1:
+                raise ExpressionError("F() takes a field name")
+            arg = node.args[0]
+            if isinstance(arg, ast.Name):
+                return F(arg.id)
+            return F(_get_field_name(arg))
+        elif name == 'Value':
+            if len(node.args) != 1:
+                raise ExpressionError("Value() takes a value")
+            return Value(_compile(node.args[0], in_call=False))
+        args = [_compile(arg, in_call=True) for arg in node.args]
+        return FUNCTIONS[name](*args)
+    raise ExpressionError("Unsupported syntax: %s" % node.__class__.__name__)
+
+
+def _get_field_name(node):
+    try:
+        name = _get_literal(node)
+    except KeyError:
+        name = None
+    if not isinstance(name, six.string_types):
+        raise ExpressionError("F() takes a field name")
+    return name
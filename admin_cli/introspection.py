@@ -0,0 +1,251 @@
+"""
+Indexes, estimated number of rows and sizes of models' tables, read from
+database, used by ``describe`` and to stop filtering or ordering which would
+scan large tables.
+"""
+from django.core.exceptions import FieldDoesNotExist
+from django.db import connections, router, DatabaseError
+from django.db.models.constants import LOOKUP_SEP
+
+
+def get_indexes(model, using=None):
+    """
+    Get the indexes of model's table, with its primary key.
+
+    :returns: Name, columns and kind (``'primary key'``, ``'unique'`` or
+              ``'index'``) of each index, sorted by name
+    :rtype: ``list`` of ``tuple``
+    """
+    connection = connections[using or router.db_for_read(model)]
+    with connection.cursor() as cursor:
+        constraints = connection.introspection.get_constraints(
+            cursor, model._meta.db_table)
+    indexes = []
+    for name, constraint in sorted(constraints.items()):
+        if constraint['primary_key']:
+            kind = 'primary key'
+        elif constraint['unique']:
+            kind = 'unique'
+        elif constraint['index']:
+            kind = 'index'
+        else:
+            # Foreign keys and checks
+            continue
+        indexes.append((name, constraint['columns'], kind))
+    return indexes
+
+
+def get_declared_columns(model):
+    """
+    Get the columns leading an index declared by model, which are usable
+    to filter or order rows.
+
+    :rtype: ``set`` of ``str``
+    """
+    opts = model._meta
+    columns = set([f.column for f in opts.fields
+                   if f.primary_key or f.unique or f.db_index])
+    together = list(opts.unique_together) + list(opts.index_together)
+    for names in together:
+        if names:
+            name = names[0].lstrip('-')
+            columns.add(opts.get_field(name).column)
+    return columns
+
+
+def get_unindexed_fields(model, lookups, using=None):
+    """
+    Get the fields of ``lookups`` whose column doesn't lead an index of
+    model's table, so filtering or ordering by them scans the table.
+    Database is only read if a field isn't indexed by model's declaration.
+
+    :param lookups: Lookups as ``'field__lookup'`` or orderings as
+                    ``'-field'``
+    :type lookups: ``list`` of ``str``
+
+    :rtype: ``list`` of ``str``
+    """
+    opts = model._meta
+    fields = []
+    for lookup in lookups:
+        name = lookup.lstrip('-').split(LOOKUP_SEP)[0]
+        if name == 'pk':
+            continue
+        try:
+            field = opts.get_field(name)
+        except FieldDoesNotExist:
+            continue
+        # Reverse relations and many-to-many haven't column in the table
+        if not getattr(field, 'concrete', False) or field.many_to_many:
+            continue
+        if field not in fields:
+            fields.append(field)
+    declared = get_declared_columns(model)
+    fields = [f for f in fields if f.column not in declared]
+    if not fields:
+        return []
+    leading = set([columns[0] for name, columns, kind
+                   in get_indexes(model, using) if columns])
+    return [f.name for f in fields if f.column not in leading]
+
+
+class TableStats(object):
+    """
+    Statistics of tables kept by database, read without scanning tables.
+    Subclasses by database's vendor are in :data:`STATS_BACKENDS`, this one
+    is used for databases without statistics.
+
+    :param connection: Connection to database
+    """
+    def __init__(self, connection):
+        self.connection = connection
+
+    def _fetchone(self, query, params):
+        with self.connection.cursor() as cursor:
+            cursor.execute(query, params)
+            return cursor.fetchone()
+
+    def estimate_rows(self, table):
+        """
+        Estimate the number of rows of ``table``.
+
+        :returns: Number of rows, ``None`` if unknown
+        :rtype: ``int``
+        """
+        return None
+
+    def get_sizes(self, table):
+        """
+        Get the size of ``table`` and the size of its indexes.
+
+        :returns: Sizes in bytes, ``None`` if unknown
+        :rtype: ``tuple``
+        """
+        return None, None
+
+
+class PostgreSQLStats(TableStats):
+    """
+    Statistics from ``pg_class``, updated by ``VACUUM`` and ``ANALYZE``.
+    """
+    relation = "FROM pg_class WHERE relname = %s AND relkind = 'r' " \
+               "AND pg_table_is_visible(oid)"
+
+    def estimate_rows(self, table):
+        row = self._fetchone('SELECT reltuples ' + self.relation, [table])
+        # Tables never analyzed have no or negative estimates
+        if not row or row[0] is None or row[0] < 0:
+            return None
+        return int(row[0])
+
+    def get_sizes(self, table):
+        row = self._fetchone('SELECT pg_table_size(oid), '
+                             'pg_indexes_size(oid) ' + self.relation, [table])
+        return tuple(row) if row else (None, None)
+
+
+class MySQLStats(TableStats):
+    """
+    Statistics from ``information_schema.tables``, estimated by InnoDB.
+    """
+    query = "SELECT table_rows, data_length, index_length " \
+            "FROM information_schema.tables " \
+            "WHERE table_schema = DATABASE() AND table_name = %s"
+
+    def estimate_rows(self, table):
+        row = self._fetchone(self.query, [table])
+        return None if not row or row[0] is None else int(row[0])
+
+    def get_sizes(self, table):
+        row = self._fetchone(self.query, [table])
+        return tuple(row[1:]) if row else (None, None)
+
+
+class SQLiteStats(TableStats):
+    """
+    Sizes from ``dbstat`` virtual table, if SQLite is compiled with it.
+    SQLite has no estimate of rows.
+    """
+    def get_sizes(self, table):
+        try:
+            return self._fetchone(
+                "SELECT (SELECT SUM(pgsize) FROM dbstat WHERE name = %s), "
+                "(SELECT SUM(pgsize) FROM dbstat WHERE name IN ("
+                "SELECT name FROM sqlite_master "
+                "WHERE type = 'index' AND tbl_name = %s))", [table, table])
+        except DatabaseError:
+            # No dbstat
+            return None, None
+
+
+#: Statistics of tables by database's vendor
+STATS_BACKENDS = {
+    'postgresql': PostgreSQLStats,
+    'mysql': MySQLStats,
+    'sqlite': SQLiteStats,
+}
+
+
+def get_stats_backend(model, using=None):
+    """
+    Get the statistics of tables of the database used to read ``model``.
+
+    :rtype: :class:`TableStats`
+    """
+    connection = connections[using or router.db_for_read(model)]
+    return STATS_BACKENDS.get(connection.vendor, TableStats)(connection)
+
+
+def estimate_row_count(model, using=None):
+    """
+    Estimate the number of rows of model's table from database's
+    statistics, without scanning it.
+
+    :returns: Estimated number of rows, ``None`` if database has no
+              statistics of tables
+    :rtype: ``int``
+    """
+    return get_stats_backend(model, using).estimate_rows(
+        model._meta.db_table)
+
+
+def get_table_stats(model, exact=False, using=None):
+    """
+    Get the number of rows of model's table and its sizes. Rows are
+    counted only if ``exact`` or if database can't estimate them.
+
+    :param exact: Count rows instead of estimating them
+    :type exact: ``bool``
+
+    :returns: Number of rows, ``True`` if it's estimated, sizes of table
+              and of its indexes in bytes or ``None`` if unknown
+    :rtype: ``tuple``
+    """
+    using = using or router.db_for_read(model)
+    backend = get_stats_backend(model, using)
+    table = model._meta.db_table
+    rows = None if exact else backend.estimate_rows(table)
+    estimated = rows is not None
+    if rows is None:
+        rows = model._default_manager.using(using).count()
+    table_size, indexes_size = backend.get_sizes(table)
+    return rows, estimated, table_size, indexes_size
+
+
+def format_size(size):
+    """
+    Format a size in bytes with a binary unit, ``'N/A'`` if ``None``.
+
+    :rtype: ``str``
+    """
+    if size is None:
+        return 'N/A'
+    for unit in ('B', 'KiB', 'MiB', 'GiB'):
+        if size < 1024:
+            break
+        size /= 1024.0
+    else:
+        unit = 'TiB'
+    if unit == 'B':
+        return '%i B' % size
+    return '%.1f %s' % (size, unit)
@@ -2,28 +2,59 @@
 Group management commands module.
 """
 import os
-from datetime import datetime, date
+import sys
+import copy
+import json
+import errno
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime, date, time
+from itertools import islice
+from operator import attrgetter, itemgetter
+from types import FunctionType, MethodType
 
 import django
 from django.core.management.base import BaseCommand, CommandError
+from django.core.exceptions import ValidationError, FieldError
 from django.core.files import File
-from django.contrib import admin
-from django.db import models
+from django.forms.models import model_to_dict
+from django.db import models, connection, connections, transaction, router, \
+    IntegrityError
+from django.db.models.deletion import Collector
+from django.db.models.query import prefetch_related_objects
 from django.conf import settings
 from django.utils.timezone import now
 from django.utils.dateformat import format as strftime
 from django.utils import six
+from django.utils.six.moves import shlex_quote
 from django.template.defaultfilters import striptags
 from django.contrib.auth.models import AnonymousUser
-from django.test import RequestFactory
 from admin_cli import settings as cli_settings
+from admin_cli.output import WRITERS, BufferedStream, exit_on_sigterm
+from admin_cli.throttle import Throttle
+from admin_cli.profiling import Profiler
+from admin_cli.expressions import parse_value, ExpressionError
+from admin_cli.readers import READERS, EXTENSIONS, MalformedRecord, \
+    open_file
+from admin_cli.workers import iter_validated
+from admin_cli.shell import Shell
+from admin_cli.registry import get_index, get_model_names, RegistryError
+from admin_cli.explain import get_sql, get_update_sql, \
+    get_aggregate_queryset, format_params, explain, ExplainError
+from admin_cli.introspection import get_indexes, get_unindexed_fields, \
+    estimate_row_count, get_table_stats, format_size
 
-REGISTRY = admin.site._registry
-MODEL_NAMES = [m._meta.model_name for m in REGISTRY]
-ACTIONS = ('list', 'delete', 'add', 'update', 'describe')
-FACTORY = RequestFactory(user=AnonymousUser())
-FALSE_REQ = FACTORY.get('')
-FALSE_REQ.user = AnonymousUser()
+ACTIONS = ('list', 'delete', 'add', 'update', 'describe', 'count', 'import')
+AGGREGATES = OrderedDict((
+    ('sum', models.Sum),
+    ('avg', models.Avg),
+    ('min', models.Min),
+    ('max', models.Max),
+))
+#: Values computed on first use, as Django imports every command for help
+_CACHE = {}
+# Model's methods are functions with Python 3 and unbound methods with 2
+MethodTypes = (FunctionType, MethodType)
 if six.PY3:  # pragma: no cover
     unicode = str
     raw_input = input
@@ -31,11 +62,46 @@ else:  # pragma: no cover
     raw_input = raw_input
 
 
+def get_false_request():
+    """
+    Get the anonymous request given to ``ModelAdmin``'s methods, built on
+    first use as :mod:`django.test` is long to import.
+    """
+    if 'request' not in _CACHE:
+        from django.test import RequestFactory
+        request = RequestFactory().get('')
+        request.user = AnonymousUser()
+        _CACHE['request'] = request
+    return _CACHE['request']
+
+
+class ModelChoices(object):
+    """
+    Choices of ``model`` argument, only listed when parser checks or writes
+    them.
+    """
+    def __iter__(self):
+        return iter(get_model_names() + ['shell'])
+
+    def __contains__(self, name):
+        return name == 'shell' or any([
+            name.lower() in get_index(site_name)
+            for site_name in cli_settings.SITES
+        ])
+
+
 class Command(BaseCommand):
+    #: Name of admin site in ``ADMIN_CLI_SITES``
+    site_name = None
+    #: :class:`admin_cli.profiling.Profiler` of ``--profile``
+    profiler = None
+
     def add_arguments(self, parser):
-        parser.add_argument('model', nargs=1, type=str, choices=MODEL_NAMES,
-                            help="Model to manage")
-        parser.add_argument('action', type=str, choices=ACTIONS,
+        parser.add_argument('model', nargs=1, type=str,
+                            choices=ModelChoices(),
+                            help="Model to manage, or 'shell' to run \
+                            commands interactively")
+        parser.add_argument('action', nargs='?', type=str, choices=ACTIONS,
                             help="Action to run")
         parser.add_argument('-f', '--field', type=str, action='append',
                             help="Field to add/update")
@@ -50,23 +116,105 @@ class Command(BaseCommand):
                             input of any kind.")
         parser.add_argument('-I', '--file', type=str, action='append',
                             help="File to use as a field for add/update.")
+        parser.add_argument('--chunk-size', type=int, default=None,
+                            help="Number of rows fetched by query while \
+                            listing, '0' loads all rows in memory.")
+        parser.add_argument('--format', type=str, choices=list(WRITERS),
+                            default='table', dest='output_format',
+                            help="Output format of listed rows.")
+        parser.add_argument('--buffer-size', type=int, default=None,
+                            help="Number of characters buffered before \
+                            writing listed rows, '0' writes every row.")
+        parser.add_argument('--limit', type=int, default=None,
+                            help="Maximum number of rows to list.")
+        parser.add_argument('--after', type=str, default=None,
+                            help="Cursor of the last listed row, written \
+                            with '--limit', to get the next page.")
+        parser.add_argument('--batch-size', type=int, default=None,
+                            help="Number of instances updated or deleted \
+                            by statement with '--noinput', '0' makes a \
+                            single statement.")
+        parser.add_argument('--input', type=str, default='-',
+                            help="File of records to import, as JSON lines, \
+                            CSV or TSV. Standard input by default.")
+        parser.add_argument('--rejects', type=str, default=None,
+                            help="File to write unvalid imported records.")
+        parser.add_argument('--script', type=str, default=None,
+                            help="File of commands run by shell, '-' for \
+                            standard input.")
+        parser.add_argument('--atomic', action='store_true',
+                            help="Run shell's script in one transaction.")
+        parser.add_argument('--keep-going', action='store_true',
+                            help="Run shell's script after a failed line.")
+        parser.add_argument('--upsert-on', type=str, default=None,
+                            help="Update instances with same values of \
+                            these fields instead of adding them, separated \
+                            by ','.")
+        parser.add_argument('--workers', type=int, default=0,
+                            help="Number of processes validating imported \
+                            records.")
+        parser.add_argument('--validate', action='store_true',
+                            help="Validate updated instances with \
+                            ModelAdmin's form, with '--noinput'.")
+        parser.add_argument('--sleep-between-batches', type=float,
+                            default=0, help="Seconds to wait between \
+                            batches of deleted or updated instances.")
+        parser.add_argument('--max-rows-per-second', type=float,
+                            default=None, help="Maximum number of \
+                            instances deleted or updated by second.")
+        parser.add_argument('--group-by', type=str, action='append',
+                            help="Field used to group counted rows.")
+        for name in AGGREGATES:
+            parser.add_argument('--%s' % name, type=str, action='append',
+                                help="Field to %s with count." % name)
+        parser.add_argument('--show-queries', action='store_true',
+                            help="Write the number of SQL queries made.")
+        parser.add_argument('--profile', action='store_true',
+                            help="Write time spent by phases, SQL queries \
+                            and peak memory.")
+        parser.add_argument('--profile-out', type=str, default=None,
+                            help="File to write cProfile statistics, \
+                            implies --profile.")
+        parser.add_argument('--explain', action='store_true',
+                            help="Write SQL and plan of list, count, update \
+                            or delete without running it.")
+        parser.add_argument('--analyze', action='store_true',
+                            help="Run the query explained to get its actual \
+                            costs, if database supports it.")
+        parser.add_argument('--force', action='store_true',
+                            help="Filter or order by unindexed fields even \
+                            on tables above ADMIN_CLI_SCAN_THRESHOLD rows.")
+        parser.add_argument('--exact', action='store_true',
+                            help="Count rows of described table instead of \
+                            estimating them.")
+        parser.add_argument('--site', type=str, default=None,
+                            help="Name of admin site in ADMIN_CLI_SITES, \
+                            'default' by default.")
 
     def _get_model(self, name):
         """
-        Get a registered model from its name.
+        Get a model registered in admin site from its name.
 
-        :param name: Model's name
+        :param name: Model's name, or ``app_label.model_name`` if several
+                     apps have a model with this name
         :type name: ``str``
 
         :returns: Model class
         :rtype: :class:`models.Model`
 
-        :raises: CommandError: If model is not registered in admin
+        :raises: CommandError: If model is not registered in admin or if
+                 its name is ambiguous
         """
         try:
-            return [m for m in REGISTRY if m._meta.model_name == name][0]
-        except IndexError:
-            raise CommandError("Can't find model '%s' in admin registry")
+            return get_index(self.site_name).get_model(name)
+        except RegistryError as err:
+            raise CommandError(err.args[0])
+
+    def _get_modeladmin(self, model):
+        """
+        Get the ``ModelAdmin`` of a model registered in admin site.
+        """
+        return get_index(self.site_name).registry[model]
 
     def _get_field_object(self, modeladmin, field):
         """
@@ -157,41 +305,325 @@ class Command(BaseCommand):
         :returns: Value of attribute, called if callable
         :rtype: Trying ``str``
         """
-        is_django16_fk = django.VERSION < (1, 7) and \
-            field in obj._meta.get_all_field_names() and \
-            isinstance(obj._meta.get_field(field), models.ForeignKey)
+        return self._get_field_accessor(modeladmin, field)(obj)
+
+    def _get_field_accessor(self, modeladmin, field, index=None, raw=False):
+        """
+        Resolve ``field`` string once into a function getting its value from
+        instances, instead of inspecting model and modeladmin for each row.
+
+        :param modeladmin: ModelAdmin of model
+        :type modeladmin: :class:`admin.ModelAdmin`
+
+        :param field: Name of attribute, example ``'__str__'`` or ``'id'``
+        :type field: ``str``
+
+        :param index: Position of ``field`` if rows are tuples from
+                      ``QuerySet.values_list`` instead of instances
+        :type index: ``int``
+
+        :param raw: Keep value's type instead of formatting it as text
+        :type raw: ``bool``
+
+        :returns: Function taking an instance of model and returning the
+                  value of attribute, called if callable
+        :rtype: ``callable``
+        """
+        if index is None:
+            getter = self._get_field_getter(modeladmin, field, raw)
+        else:
+            getter = self._get_column_getter(modeladmin, field, index, raw)
+        if raw:
+            return getter
+
+        def accessor(obj):
+            value = getter(obj)
+            # Remove HTML and new lines
+            try:
+                value = str(value).replace('\n', '')
+            except:
+                return value
+            if '<' in value:
+                value = striptags(value)
+            return value
+        return accessor
+
+    def _get_field_getter(self, modeladmin, field, raw=False):
+        """
+        Choose how to get value of ``field`` from an instance: model's method,
+        modeladmin's attribute, model's field or any other model attribute.
+        """
+        model = modeladmin.model
+        modelfield = None
+        if field in model._meta.get_all_field_names():
+            modelfield = model._meta.get_field(field)
         if field.startswith('__'):
-            value = getattr(obj, field)()
-        # Django 1.6 doesn't support get empty FK
-        elif is_django16_fk:  # pragma: no cover
-            value = getattr(obj, obj._meta.get_field(field).attname)
+            return lambda obj: getattr(obj, field)()
         elif hasattr(modeladmin, field):
             value = getattr(modeladmin, field)
-        elif hasattr(obj, field):
-            value = getattr(obj, field)
-            if isinstance(value, datetime):
-                value = strftime(value, settings.SHORT_DATETIME_FORMAT)
-            elif isinstance(value, date):
-                value = strftime(value, settings.SHORT_DATE_FORMAT)
-            elif value.__class__.__name__ == 'ManyRelatedManager':
-                value = ','.join([str(a) for a in value.all()])
-        else:
-            value = 'N/A'
+            if hasattr(value, '__call__'):
+                return self._get_callable_getter(value)
+            return lambda obj: value
+        elif isinstance(modelfield, models.ManyToManyField) and raw:
+            return lambda obj: list(getattr(obj, field).all())
+        elif isinstance(modelfield, models.ManyToManyField):
+            return lambda obj: ','.join([
+                str(a) for a in getattr(obj, field).all()])
+        elif isinstance(modelfield, models.DateField) and raw:
+            return attrgetter(field)
+        elif isinstance(modelfield, models.DateTimeField):
+            return self._get_date_getter(attrgetter(field),
+                                         settings.SHORT_DATETIME_FORMAT)
+        elif isinstance(modelfield, models.DateField):
+            return self._get_date_getter(attrgetter(field),
+                                         settings.SHORT_DATE_FORMAT)
+        elif isinstance(modelfield, models.ForeignKey):
+            return self._get_related_getter(field)
+        elif modelfield in model._meta.fields:
+            return attrgetter(field)
+        elif hasattr(model, field) and \
+                isinstance(getattr(model, field), MethodTypes):
+            return lambda obj: getattr(obj, field)()
+        elif hasattr(model, field):
+            return lambda obj: self._get_attribute_value(obj, field, raw)
+        return lambda obj: 'N/A'
+
+    def _get_column_getter(self, modeladmin, field, index, raw=False):
+        """
+        Get a function reading value of ``field`` in a row from
+        ``QuerySet.values_list``.
+        """
+        modelfield = modeladmin.model._meta.get_field(field)
+        if raw:
+            return itemgetter(index)
+        elif isinstance(modelfield, models.DateTimeField):
+            return self._get_date_getter(itemgetter(index),
+                                         settings.SHORT_DATETIME_FORMAT)
+        elif isinstance(modelfield, models.DateField):
+            return self._get_date_getter(itemgetter(index),
+                                         settings.SHORT_DATE_FORMAT)
+        return itemgetter(index)
+
+    def _get_callable_getter(self, func):
+        """
+        Get a function calling ``func`` with the instance as argument or,
+        after a first ``TypeError``, without any argument.
+        """
+        takes_obj = [True]
+
+        def getter(obj):
+            if takes_obj[0]:
+                try:
+                    return func(obj)
+                except TypeError:
+                    takes_obj[0] = False
+            return func()
+        return getter
+
+    def _get_date_getter(self, get_value, date_format):
+        """
+        Get a function returning date from ``get_value`` formatted with
+        ``date_format``.
+        """
+        def getter(obj):
+            value = get_value(obj)
+            if value is None:
+                return value
+            return strftime(value, date_format)
+        return getter
+
+    def _get_related_getter(self, field):
+        """
+        Get a function returning related instance of ``field`` or ``'N/A'``
+        if it is not set.
+        """
+        def getter(obj):
+            try:
+                return getattr(obj, field)
+            except AttributeError:
+                return 'N/A'
+        return getter
+
+    def _get_attribute_value(self, obj, field, raw=False):
+        """
+        Get value of any other model's attribute such as properties or
+        related managers.
+        """
+        value = getattr(obj, field)
+        if isinstance(value, date) and raw:
+            return value
+        elif isinstance(value, datetime):
+            value = strftime(value, settings.SHORT_DATETIME_FORMAT)
+        elif isinstance(value, date):
+            value = strftime(value, settings.SHORT_DATE_FORMAT)
+        elif value.__class__.__name__ == 'ManyRelatedManager' and raw:
+            value = list(value.all())
+        elif value.__class__.__name__ == 'ManyRelatedManager':
+            value = ','.join([str(a) for a in value.all()])
         if hasattr(value, '__call__'):
             # Some callable new instance as arg
             try:
                 value = value(obj)
             except TypeError:
                 value = value()
-        # Remove HTML and new lines
-        try:
-            value = str(value).replace('\n', '')
-            value = striptags(value)
-        except:
-            pass
         return value
 
-    def _list(self, modeladmin, fields=[], filters={}, orders=[]):
+    def _get_related_lookups(self, modeladmin, fields):
+        """
+        Get the relations to fetch with rows for display ``fields``.
+
+        :param modeladmin: ModelAdmin of model
+        :type modeladmin: :class:`admin.ModelAdmin`
+
+        :param fields: Fields to display
+        :type fields: ``list`` of ``str``
+
+        :returns: Lookups for ``select_related`` (``None`` to follow every
+                  non-null relation) and for ``prefetch_related``
+        :rtype: ``tuple``
+        """
+        select_related = []
+        prefetch_related = []
+        field_names = modeladmin.model._meta.get_all_field_names()
+        for field in fields:
+            if field not in field_names or hasattr(modeladmin, field):
+                continue
+            modelfield = modeladmin.model._meta.get_field(field)
+            if isinstance(modelfield, models.ManyToManyField):
+                prefetch_related.append(field)
+            elif isinstance(modelfield, models.ForeignKey):
+                select_related.append(field)
+        list_select_related = getattr(modeladmin, 'list_select_related',
+                                      False)
+        if list_select_related is True:
+            select_related = None
+        elif list_select_related:
+            select_related.extend(list_select_related)
+        return select_related, prefetch_related
+
+    def _get_projection(self, modeladmin, fields, select_related):
+        """
+        Get the model's fields to fetch from database for display
+        ``fields``, instead of every column.
+
+        :param modeladmin: ModelAdmin of model
+        :type modeladmin: :class:`admin.ModelAdmin`
+
+        :param fields: Fields to display
+        :type fields: ``list`` of ``str``
+
+        :param select_related: Lookups given to ``select_related``
+        :type select_related: ``list`` of ``str`` or ``None``
+
+        :returns: Names for ``values_list`` if every field is a concrete
+                  field, else names for ``only`` if every field is a
+                  model's field (``None`` if there's a need of instances
+                  with every column)
+        :rtype: ``tuple``
+        """
+        opts = modeladmin.model._meta
+        field_names = opts.get_all_field_names()
+        modelfields = []
+        for field in fields:
+            if field not in field_names or hasattr(modeladmin, field):
+                return None, None
+            modelfield = opts.get_field(field)
+            if modelfield not in opts.fields and \
+                    modelfield not in opts.many_to_many:
+                return None, None
+            modelfields.append(modelfield)
+        is_relation = [isinstance(f, (models.ForeignKey,
+                                      models.ManyToManyField))
+                       for f in modelfields]
+        if select_related is None:
+            return None, [f.name for f in modelfields if f in opts.fields]
+        elif not any(is_relation) and not select_related:
+            return [f.name for f in modelfields], None
+        only = [f.name for f in modelfields if f in opts.fields]
+        only.extend([s.split('__')[0] for s in select_related])
+        return None, only
+
+    def _iter_queryset(self, queryset, chunk_size, prefetch_related=(),
+                       keys=(), key_getters=(), limit=None):
+        """
+        Iterate over ``queryset`` without keeping its rows in memory, by
+        pages of ``chunk_size`` rows selected after the last row of
+        previous page, as database drivers fetch whole results.
+
+        :param queryset: QuerySet to evaluate, ordered by ``keys``
+        :type queryset: :class:`models.QuerySet`
+
+        :param chunk_size: Number of rows fetched by query, ``0`` evaluates
+                           and caches the whole queryset
+        :type chunk_size: ``int``
+
+        :param prefetch_related: Lookups prefetched for each page of rows
+        :type prefetch_related: ``list`` of ``str``
+
+        :param keys: Ordering used to select pages, as returned by
+                     :meth:`_get_keyset`, rows are fetched by one query if
+                     empty
+        :type keys: ``list`` of ``str``
+
+        :param key_getters: Functions getting the value of each key from a
+                            row
+        :type key_getters: ``list``
+
+        :param limit: Maximum number of rows
+        :type limit: ``int``
+
+        :returns: Iterator of model instances or of rows of values
+        """
+        if not chunk_size or not keys:
+            queryset = queryset[:limit] if limit else queryset
+            if not chunk_size:
+                return iter(queryset.prefetch_related(*prefetch_related))
+            return self._iter_prefetched(queryset.iterator(), chunk_size,
+                                         prefetch_related)
+        return self._iter_pages(queryset, chunk_size, prefetch_related,
+                                keys, key_getters, limit)
+
+    def _iter_pages(self, queryset, chunk_size, prefetch_related, keys,
+                    key_getters, limit=None):
+        """
+        Fetch rows of :meth:`_iter_queryset` by pages of ``chunk_size``,
+        making one prefetch per relation and page.
+        """
+        count = 0
+        page_queryset = queryset
+        while True:
+            size = chunk_size if limit is None \
+                else min(chunk_size, limit - count)
+            if size <= 0:
+                return
+            rows = list(page_queryset[:size])
+            if prefetch_related:
+                prefetch_related_objects(rows, prefetch_related)
+            for row in rows:
+                yield row
+            count += len(rows)
+            if len(rows) < size:
+                return
+            values = [getter(rows[-1]) for getter in key_getters]
+            page_queryset = queryset.filter(
+                self._get_keyset_filter(keys, values))
+
+    def _iter_prefetched(self, iterator, chunk_size, prefetch_related):
+        """
+        Make one prefetch per relation and chunk of rows, as
+        ``QuerySet.iterator`` ignores ``prefetch_related``.
+        """
+        chunk = list(islice(iterator, chunk_size))
+        while chunk:
+            if prefetch_related:
+                prefetch_related_objects(chunk, prefetch_related)
+            for obj in chunk:
+                yield obj
+            chunk = list(islice(iterator, chunk_size))
+
+    def _list(self, modeladmin, fields=[], filters={}, orders=[],
+              chunk_size=cli_settings.CHUNK_SIZE, output_format='table',
+              buffer_size=cli_settings.BUFFER_SIZE, limit=None, after=None):
         """
         Write instances filtered and with chosen attributes.
 
@@ -207,22 +639,283 @@ class Command(BaseCommand):
 
         :param orders: Row ordering
         :type orders: ``list`` of ``str``
+
+        :param chunk_size: Number of rows fetched by query
+        :type chunk_size: ``int``
+
+        :param output_format: Name of writer from
+                              :data:`admin_cli.output.WRITERS`
+        :type output_format: ``str``
+
+        :param buffer_size: Number of characters buffered before writing
+        :type buffer_size: ``int``
+
+        :param limit: Maximum number of rows to list
+        :type limit: ``int``
+
+        :param after: Cursor of the last row of previous page
+        :type after: ``str``
+        """
+        stream = BufferedStream(self.stdout, buffer_size)
+        try:
+            with stream, exit_on_sigterm():
+                cursor = self._write_rows(stream, modeladmin, fields, filters,
+                                          orders, chunk_size, output_format,
+                                          limit, after)
+                with self._phase('Output'):
+                    stream.flush()
+        except IOError as err:
+            # Reader as 'head' is gone, stop querying rows
+            if err.errno != errno.EPIPE:
+                raise
+            stream.discard()
+            return
+        if cursor is not None:
+            self.stderr.write("Next page: --after %s" % shlex_quote(cursor))
+
+    def _get_keyset(self, modeladmin, orders):
+        """
+        Get the ordering used for keyset pagination: ``orders`` or model's
+        default ordering, with primary key to make it unique.
+
+        :param modeladmin: ModelAdmin of model
+        :type modeladmin: :class:`admin.ModelAdmin`
+
+        :param orders: Row ordering
+        :type orders: ``list`` of ``str``
+
+        Foreign keys are replaced by their column, ordering by the related
+        model would use its default ordering instead of the compared value.
+
+        :returns: Attribute names of fields, prefixed by ``'-'`` if
+                  descending
+        :rtype: ``list`` of ``str``
+
+        :raises CommandError: If ordering isn't made of model's fields or
+                              if one of them is nullable, as ``NULL``
+                              can't be compared
+        """
+        opts = modeladmin.model._meta
+        fields = dict([(f.name, f) for f in opts.fields])
+        fields.update([(f.attname, f) for f in opts.fields])
+        keys = []
+        for key in orders or opts.ordering:
+            name = key.lstrip('-')
+            if name != 'pk' and name not in fields:
+                raise CommandError("Can't paginate with ordering by '%s'"
+                                   % key)
+            if name != 'pk' and fields[name].null:
+                raise CommandError("Can't paginate with ordering by nullable"
+                                   " '%s'" % key)
+            if name != 'pk':
+                key = key[:len(key) - len(name)] + fields[name].attname
+            keys.append(key)
+        names = [k.lstrip('-') for k in keys]
+        if 'pk' not in names and opts.pk.name not in names:
+            keys.append('pk')
+        return keys
+
+    def _get_keyset_filter(self, keys, values):
+        """
+        Get lookups selecting the rows after ``values`` in ``keys`` ordering,
+        instead of using an ``OFFSET``.
+
+        :param keys: Ordering, as returned by :meth:`_get_keyset`
+        :type keys: ``list`` of ``str``
+
+        :param values: Values of ``keys`` for the last row of previous page
+        :type values: ``list``
+
+        :returns: Lookups ``(k1 > v1) | (k1 = v1 & k2 > v2) | ...``
+        :rtype: :class:`models.Q`
+        """
+        lookups = None
+        for i, key in enumerate(keys):
+            op = 'lt' if key.startswith('-') else 'gt'
+            lookup = models.Q(**{'%s__%s' % (key.lstrip('-'), op): values[i]})
+            for prev_key, prev_value in zip(keys[:i], values[:i]):
+                lookup &= models.Q(**{prev_key.lstrip('-'): prev_value})
+            lookups = lookup if lookups is None else lookups | lookup
+        return lookups
+
+    def _format_cursor(self, values):
+        """
+        Write values of pagination keys as a JSON list, without losing
+        precision: dates and times are in full ISO-8601 and other values
+        which aren't JSON's scalars are strings, as decimals.
+
+        :rtype: ``str``
+        """
+        cursor = []
+        for value in values:
+            if isinstance(value, (date, time)):
+                value = value.isoformat()
+            elif not isinstance(value, (bool, float, type(None)) +
+                                six.integer_types + six.string_types):
+                value = six.text_type(value)
+            cursor.append(value)
+        return json.dumps(cursor)
+
+    def _parse_cursor(self, keys, after):
+        """
+        Get values of ``keys`` from a cursor written by a previous listing:
+        a JSON list or a single value.
+
+        :raises CommandError: If cursor hasn't one value by key
+        """
+        try:
+            values = json.loads(after)
+        except ValueError:
+            values = after
+        if not isinstance(values, list):
+            values = [values]
+        if len(values) != len(keys):
+            raise CommandError("Cursor must have a value for each of: %s"
+                               % ', '.join(keys))
+        return values
+
+    def _get_list_queryset(self, modeladmin, fields, filters, orders,
+                           limit=None, after=None, chunk_size=0):
+        """
+        Get the queryset of listing, selecting only columns of ``fields``
+        and related objects they need. It's ordered by a keyset if rows are
+        paginated or fetched by chunks, and isn't sliced by ``limit``.
+
+        :returns: Queryset, names of fields of ``values_list`` or ``None``
+                  if rows are instances, lookups to prefetch, the keyset
+                  and getters of its keys from a row
+        :rtype: ``tuple``
+        """
+        select_related, prefetch_related = self._get_related_lookups(
+            modeladmin, fields)
+        values, only = self._get_projection(modeladmin, fields,
+                                            select_related)
+        queryset = modeladmin.model.objects.filter(**filters).order_by(*orders)
+        keys = []
+        if limit or after:
+            keys = self._get_keyset(modeladmin, orders)
+        elif chunk_size:
+            try:
+                keys = self._get_keyset(modeladmin, orders)
+            except CommandError:
+                # Rows are fetched by one query
+                keys = []
+        if keys:
+            queryset = queryset.order_by(*keys)
+        if after:
+            cursor_values = self._parse_cursor(keys, after)
+            queryset = queryset.filter(
+                self._get_keyset_filter(keys, cursor_values))
+        key_names = [k.lstrip('-') for k in keys]
+        if values:
+            queryset = queryset.values_list(*(values + key_names))
+            key_getters = [itemgetter(len(values) + i)
+                           for i in range(len(keys))]
+        else:
+            if only:
+                queryset = queryset.only(*(only + key_names))
+            key_getters = [attrgetter(n) for n in key_names]
+        if select_related is None:
+            queryset = queryset.select_related()
+        elif select_related:
+            queryset = queryset.select_related(*select_related)
+        return queryset, values, prefetch_related, keys, key_getters
+
+    def _write_rows(self, stream, modeladmin, fields, filters, orders,
+                    chunk_size, output_format, limit=None, after=None):
+        """
+        Write header and rows of listing to ``stream``.
+
+        :returns: Cursor of the last row if ``limit`` has been reached
+        :rtype: ``str``
         """
         fields = fields or modeladmin.list_display
         field_names = [self._get_field_name(modeladmin, f) for f in fields]
-        row_template = ''
-        for field in fields:
-            width = self._get_field_width(modeladmin, field)
-            row_template += '{:%i}' % width
-        self.stdout.write(row_template.format(*field_names))
-        queryset = modeladmin.model.objects.filter(**filters).order_by(*orders)
-        for obj in queryset:
-            values = [self._get_field_value(modeladmin, field, obj)
-                      for field in fields]
-            row = row_template.format(*values)
-            self.stdout.write(row)
+        widths = [self._get_field_width(modeladmin, f) for f in fields]
+        writer = WRITERS[output_format](stream, fields, field_names, widths)
+        writer.write_header()
+        queryset, values, prefetch_related, keys, key_getters = \
+            self._get_list_queryset(modeladmin, fields, filters, orders,
+                                    limit, after, chunk_size)
+        accessors = [self._get_field_accessor(modeladmin, field,
+                                              i if values else None,
+                                              writer.raw)
+                     for i, field in enumerate(fields)]
+        rows = self._iter_queryset(queryset, chunk_size, prefetch_related,
+                                   keys, key_getters, limit)
+        write_row = writer.write_row
+        if self.profiler is not None:
+            rows = self.profiler.timed_iter('Query', rows)
+            accessors = [self.profiler.timed('Rendering', accessor)
+                         for accessor in accessors]
+            write_row = self.profiler.timed('Output', write_row)
+        count = 0
+        obj = None
+        for obj in rows:
+            write_row([accessor(obj) for accessor in accessors])
+            count += 1
+        if limit and count == limit:
+            return self._format_cursor([getter(obj)
+                                        for getter in key_getters])
 
-    def _delete(self, modeladmin, filters={}, confirm=True):
+    def _count(self, modeladmin, filters={}, group_by=[], aggregates={},
+               output_format='table'):
+        """
+        Write number of instances filtered, with aggregates computed by
+        database, by group of values.
+
+        :param modeladmin: ModelAdmin of model
+        :type modeladmin: :class:`admin.ModelAdmin`
+
+        :param filters: Lookups for filters
+        :type filters: ``dict``
+
+        :param group_by: Fields used to group rows
+        :type group_by: ``list`` of ``str``
+
+        :param aggregates: Fields to aggregate by name of function from
+                           :data:`AGGREGATES`, example ``{'sum': ['price']}``
+        :type aggregates: ``dict``
+
+        :param output_format: Name of writer from
+                              :data:`admin_cli.output.WRITERS`
+        :type output_format: ``str``
+        """
+        queryset, expressions = self._get_count_queryset(
+            modeladmin, filters, group_by, aggregates)
+        rows = queryset if group_by else [queryset.aggregate(**expressions)]
+        columns = list(group_by) + list(expressions)
+        names = [c.capitalize() for c in columns]
+        writer = WRITERS[output_format](self.stdout, columns, names,
+                                        [21] * len(columns))
+        writer.write_header()
+        for row in rows:
+            values = [row[c] for c in columns]
+            if not writer.raw:
+                values = [str(v) for v in values]
+            writer.write_row(values)
+
+    def _get_count_queryset(self, modeladmin, filters, group_by, aggregates):
+        """
+        Get the queryset of rows counted by :meth:`_count`, grouped by
+        ``group_by`` if given, and the aggregates to compute.
+
+        :returns: Queryset and aggregates by name of column
+        :rtype: ``tuple``
+        """
+        expressions = OrderedDict([('count', models.Count('pk'))])
+        for name, function in AGGREGATES.items():
+            for field in aggregates.get(name, []):
+                expressions['%s__%s' % (field, name)] = function(field)
+        queryset = modeladmin.model.objects.filter(**filters)
+        if group_by:
+            # Ordering also clears model's one, which would split groups
+            queryset = queryset.order_by(*group_by).values(*group_by)\
+                .annotate(**expressions)
+        return queryset, expressions
+
+    def _delete(self, modeladmin, filters={}, confirm=True,
+                batch_size=cli_settings.BATCH_SIZE, throttle=None):
         """
         Delete one or more instances filtered.
 
@@ -232,9 +925,19 @@ class Command(BaseCommand):
         :param filters: Lookups for filters
         :type filters: ``dict``
 
-        :param confirm: Ask confirmation before make operation
+        :param confirm: Ask confirmation before make operation, if ``False``
+                        instances are deleted by batches
         :type confirm: ``bool``
+
+        :param batch_size: Number of instances deleted by transaction
+        :type batch_size: ``int``
+
+        :param throttle: Pace of batches
+        :type throttle: :class:`admin_cli.throttle.Throttle`
         """
+        if not confirm:
+            return self._bulk_delete(modeladmin, filters, batch_size,
+                                     throttle or Throttle())
         for obj in modeladmin.model.objects.filter(**filters):
             if confirm:
                 # TODO: Declare related element
@@ -249,7 +952,68 @@ class Command(BaseCommand):
             obj.delete()
             self.stdout.write("Deleted '%s'" % obj)
 
-    def _add(self, modeladmin, fields, filefields):
+    def _bulk_delete(self, modeladmin, filters, batch_size, throttle):
+        """
+        Delete instances filtered by batches of primary keys, each one in its
+        own transaction, and write number of deleted instances by model.
+        """
+        queryset = modeladmin.model.objects.filter(**filters)
+        deleted = {}
+        if not batch_size:
+            with transaction.atomic(using=queryset.db):
+                deleted = self._delete_queryset(queryset)
+        while batch_size:
+            pks = list(queryset.order_by('pk')
+                       .values_list('pk', flat=True)[:batch_size])
+            if not pks:
+                break
+            throttle.wait()
+            batch = modeladmin.model.objects.filter(pk__in=pks)
+            with transaction.atomic(using=batch.db):
+                counts = self._delete_queryset(batch)
+            for label, count in counts.items():
+                deleted[label] = deleted.get(label, 0) + count
+            throttle.add(len(pks))
+            self._write_progress('Deleted', throttle)
+        for label, count in sorted(deleted.items()):
+            if not count:
+                continue
+            self.stdout.write("Deleted %i '%s'" % (count, label))
+
+    def _write_progress(self, verb, throttle):
+        """
+        Write number of rows done and rate, if batches are paced or
+        verbosity is above 1.
+        """
+        if throttle.enabled or self.verbosity > 1:
+            self.stderr.write("%s %i rows (%.1f rows/s)" % (
+                verb, throttle.rows, throttle.rate))
+
+    def _delete_queryset(self, queryset):
+        """
+        Delete ``queryset`` with Django's collector, which sends signals and
+        cascades as ``Model.delete``.
+
+        :returns: Number of deleted instances by model's label
+        :rtype: ``dict``
+        """
+        if django.VERSION >= (1, 9):  # pragma: no cover
+            return queryset.delete()[1]
+        collector = Collector(using=queryset.db)
+        collector.collect(queryset)
+        counts = {}
+        for model, instances in collector.data.items():
+            label = '%s.%s' % (model._meta.app_label, model._meta.object_name)
+            counts[label] = counts.get(label, 0) + len(instances)
+        # Fast deletes are made without fetching instances
+        for fast_delete in collector.fast_deletes:
+            model = fast_delete.model
+            label = '%s.%s' % (model._meta.app_label, model._meta.object_name)
+            counts[label] = counts.get(label, 0) + fast_delete.count()
+        collector.delete()
+        return counts
+
+    def _add(self, modeladmin, fields, filefields, upsert_on=None):
         """
         Update one or more fields of all instances filtered.
 
@@ -262,44 +1026,425 @@ class Command(BaseCommand):
         :param filefields: File fields to update
         :type filefields: ``dict``
 
+        :param upsert_on: Fields identifying an existing instance to update
+                          instead of creating one
+        :type upsert_on: ``list`` of ``str``
+
         :raises CommandError: If data is unvalid or files are unfoundable
         """
-        instance = modeladmin.model()
-        initial = dict([
-            (field.name, getattr(instance, field.name))
-            for field in modeladmin.model._meta.fields
-        ])
+        model = modeladmin.model
         used_fields = dict([f.split('=') for f in fields])
-        data = initial.copy()
+        key_fields = self._get_upsert_fields(model, upsert_on)
+        instance = self._get_existing(model, key_fields, [used_fields])[0]
+        if instance is None:
+            form_class = self._get_add_form_class(modeladmin)
+            data = self._get_initial_data(modeladmin)
+        else:
+            form_class = modeladmin.get_form(get_false_request(), instance)
+            data = model_to_dict(instance, fields=list(form_class.base_fields))
         data.update(used_fields)
-        for field_name, value in data.items():
-            try:
-                modelfield = modeladmin.model._meta.get_field(field_name)
-            except models.FieldDoesNotExist:
-                continue
-            if isinstance(modelfield, models.ManyToManyField):
-                data[field_name] = value.split(',')
+        self._split_many_to_many(model, data)
         files = {}
         for filename, path in filefields.items():
             try:
                 files[filename] = File(open(path, 'rb'))
             except IOError as err:
                 raise CommandError(err.args[0])
-        form_class = modeladmin.add_form if hasattr(modeladmin, 'add_form') \
-            else modeladmin.get_form(FALSE_REQ)
-        form = form_class(data=data, files=files)
+        form = form_class(data=data, files=files, instance=instance)
         if form.is_valid():
             obj = form.save()
-            self.stdout.write("Created '%s'" % obj)
+            self.stdout.write("%s '%s'" % (
+                'Created' if instance is None else 'Updated', obj))
         else:
-            error_msg = '\n'+'\n'.join([
-                ('%s: %s' % (field, err))
-                for field in form.errors
-                for err in form.errors[field]
+            raise CommandError('\n' + self._get_form_errors(form))
+
+    def _get_initial_data(self, modeladmin):
+        """
+        Get default values of a new instance, used as form data.
+
+        :param modeladmin: ModelAdmin of model
+        :type modeladmin: :class:`admin.ModelAdmin`
+
+        :returns: Values by field's name
+        :rtype: ``dict``
+        """
+        instance = modeladmin.model()
+        return dict([
+            (field.name, field.value_from_object(instance))
+            for field in modeladmin.model._meta.fields
+        ])
+
+    def _get_add_form_class(self, modeladmin):
+        """
+        Get ``ModelAdmin.add_form`` if defined, else the form of
+        ``ModelAdmin.get_form``.
+        """
+        return modeladmin.add_form if hasattr(modeladmin, 'add_form') \
+            else modeladmin.get_form(get_false_request())
+
+    def _import(self, modeladmin, path='-', input_format=None,
+                rejects_path=None, batch_size=cli_settings.BATCH_SIZE,
+                workers=0, upsert_on=None):
+        """
+        Create instances from records of a file, validated by the same form
+        than :meth:`_add`. Valid instances are created by batches and unvalid
+        records are written in a rejects file.
+
+        :param modeladmin: ModelAdmin of model
+        :type modeladmin: :class:`admin.ModelAdmin`
+
+        :param path: Path of file to import, ``'-'`` for standard input
+        :type path: ``str``
+
+        :param input_format: Name of reader from
+                             :data:`admin_cli.readers.READERS`, guessed from
+                             file's extension if ``None``
+        :type input_format: ``str``
+
+        :param rejects_path: Path of file to write unvalid records
+        :type rejects_path: ``str``
+
+        :param batch_size: Number of instances created by transaction
+        :type batch_size: ``int``
+
+        :param workers: Number of processes validating records, by chunks
+                        of ``batch_size``, records are validated by current
+                        process if lower than 2
+        :type workers: ``int``
+
+        :param upsert_on: Fields identifying instances to update instead of
+                          create, looked up by chunks of ``batch_size``
+        :type upsert_on: ``list`` of ``str``
+
+        :raises CommandError: If format is unknown, files are unfoundable
+                              or workers are used in a transaction
+        """
+        if input_format not in READERS:
+            input_format = EXTENSIONS.get(os.path.splitext(path)[1])
+        if input_format is None:
+            raise CommandError("Can't guess format of '%s', use --format"
+                               % path)
+        model = modeladmin.model
+        key_fields = self._get_upsert_fields(model, upsert_on)
+        # Connections are closed before forking workers, which would end
+        # the transaction
+        if workers > 1 and any([conn.in_atomic_block
+                                for conn in connections.all()]):
+            raise CommandError("Can't use --workers in a transaction")
+        try:
+            stream = open_file(path)
+            rejects_stream = open_file(rejects_path, 'w') \
+                if rejects_path else None
+        except IOError as err:
+            raise CommandError(err.args[-1])
+        label = '%s.%s' % (model._meta.app_label, model._meta.object_name)
+        reader = READERS[input_format](stream)
+        records = iter(reader)
+        chunk_size = batch_size or cli_settings.BATCH_SIZE
+        chunks = iter(lambda: list(islice(records, chunk_size)), [])
+        # Existing instances are looked up by chunk, with one query each
+        chunks = (
+            (chunk, self._get_existing(model, key_fields, chunk))
+            for chunk in chunks
+        )
+        if workers > 1:
+            validated = iter_validated(label, chunks, workers,
+                                       self.site_name)
+        else:
+            validate = self._get_record_validator(modeladmin)
+            validated = (
+                (record, validate(record, instance))
+                for chunk, instances in chunks
+                for record, instance in zip(chunk, instances)
+            )
+        # Created, updated and rejected
+        counts = [0, 0, 0]
+        # Writer of rejects is made at first reject, after CSV's header
+        rejects = []
+
+        def reject(record, errors):
+            counts[2] += 1
+            if rejects_stream is None:
+                return
+            if not rejects:
+                rejects.append(reader.get_rejects_writer(rejects_stream))
+            rejects[0].write(record, errors)
+
+        def save(batch):
+            created, updated, failed = self._save_batch(
+                model, [instance for record, instance in batch])
+            counts[0] += created
+            counts[1] += updated
+            for index, errors in failed:
+                reject(batch[index][0], errors)
+
+        batch = []
+        seen_keys = set()
+        try:
+            for record, (obj, many_to_many, errors) in validated:
+                key = self._get_upsert_key(key_fields, record)
+                if errors is None and key is not None:
+                    if key in seen_keys:
+                        errors = {'__all__': [
+                            "Duplicate of a previous record's %s"
+                            % ', '.join(upsert_on)]}
+                    seen_keys.add(key)
+                if errors is None:
+                    batch.append((record, (obj, many_to_many)))
+                else:
+                    reject(record, errors)
+                if batch_size and len(batch) >= batch_size:
+                    save(batch)
+                    batch = []
+            if batch:
+                save(batch)
+        finally:
+            for opened in (stream, rejects_stream):
+                if opened not in (None, sys.stdin, sys.stdout):
+                    opened.close()
+        created, updated, rejected = counts
+        self.stdout.write("Created %i '%s'" % (created, label))
+        if updated:
+            self.stdout.write("Updated %i '%s'" % (updated, label))
+        if rejected:
+            self.stdout.write("Rejected %i '%s'" % (rejected, label))
+
+    def _get_record_validator(self, modeladmin):
+        """
+        Get a function validating a record with the add form, or with the
+        change form if an existing instance is given. Form classes are
+        built once.
+
+        :param modeladmin: ModelAdmin of model
+        :type modeladmin: :class:`admin.ModelAdmin`
+
+        :returns: Function taking a record and an instance or ``None``, and
+                  returning the result of :meth:`_validate_record`
+        :rtype: ``function``
+        """
+        model = modeladmin.model
+        add_form_class = self._get_add_form_class(modeladmin)
+        initial = self._get_initial_data(modeladmin)
+        change_form_classes = []
+
+        def validate(record, instance=None):
+            if isinstance(record, MalformedRecord):
+                return None, None, record.errors
+            if instance is None:
+                return self._validate_record(model, add_form_class, initial,
+                                             record)
+            if not change_form_classes:
+                change_form_classes.append(
+                    modeladmin.get_form(get_false_request(), instance))
+            form_class = change_form_classes[0]
+            data = model_to_dict(instance, fields=list(form_class.base_fields))
+            return self._validate_record(model, form_class, data, record,
+                                         instance)
+        return validate
+
+    def _validate_record(self, model, form_class, initial, record,
+                         instance=None):
+        """
+        Validate an imported ``record`` with an add or change form.
+
+        :param model: Model of form
+        :type model: :class:`django.db.models.Model`
+
+        :param form_class: Add form of model, or change form if ``instance``
+                           is given
+        :type form_class: :class:`django.forms.ModelForm`
+
+        :param initial: Default values of form
+        :type initial: ``dict``
+
+        :param record: Values by field's name
+        :type record: ``dict``
+
+        :param instance: Existing instance to update
+        :type instance: :class:`django.db.models.Model`
+
+        :returns: Unsaved instance, primary keys of its many-to-many
+                  relations by field and ``None``, or ``None``, ``None`` and
+                  messages of form's errors by field. All can be pickled.
+        :rtype: ``tuple``
+        """
+        data = initial.copy()
+        data.update(record)
+        self._split_many_to_many(model, data)
+        form = form_class(data=data, instance=instance)
+        if not form.is_valid():
+            return None, None, dict([
+                (field, [six.text_type(e) for e in errors])
+                for field, errors in form.errors.items()
             ])
-            raise CommandError(error_msg)
+        many_to_many = {}
+        for field in model._meta.many_to_many:
+            values = form.cleaned_data.get(field.name)
+            # Relations of updated instances may also be emptied
+            if values or (instance is not None and
+                          field.name in form.cleaned_data):
+                many_to_many[field.name] = [value.pk for value in values]
+        return form.save(commit=False), many_to_many, None
 
-    def _update(self, modeladmin, fields, filters, filefields, confirm=True):
+    def _save_batch(self, model, instances):
+        """
+        Write a batch of validated ``instances`` with
+        :meth:`_create_instances`, or one by one if the batch violates a
+        constraint of database, so only failing instances are rejected.
+
+        :returns: Numbers of created and updated instances, and index in
+                  batch and errors of each failing instance
+        :rtype: ``tuple``
+        """
+        new = [obj.pk is None for obj, many_to_many in instances]
+        try:
+            created, updated = self._create_instances(model, instances)
+            return created, updated, []
+        except IntegrityError:
+            pass
+        created = updated = 0
+        failed = []
+        for index, instance in enumerate(instances):
+            # Primary key may have been set in the rolled back transaction
+            if new[index]:
+                instance[0].pk = None
+            try:
+                counts = self._create_instances(model, [instance])
+            except IntegrityError as err:
+                failed.append((index, {'__all__': [six.text_type(err)]}))
+                continue
+            created, updated = created + counts[0], updated + counts[1]
+        return created, updated, failed
+
+    def _create_instances(self, model, instances):
+        """
+        Write validated ``instances`` in one transaction, with
+        ``bulk_create`` for new instances without many-to-many relations and
+        one ``UPDATE`` for existing ones.
+
+        :param instances: Unsaved instances and primary keys of their
+                          many-to-many relations by field
+        :type instances: ``list`` of ``tuple``
+
+        :returns: Numbers of created and updated instances
+        :rtype: ``tuple``
+        """
+        new_objs = [obj for obj, many_to_many in instances
+                    if obj.pk is None and not many_to_many]
+        existing_objs = [obj for obj, many_to_many in instances
+                         if obj.pk is not None]
+        update_fields = [f.name for f in model._meta.concrete_fields
+                         if not f.primary_key]
+        with transaction.atomic(using=router.db_for_write(model)):
+            model.objects.bulk_create(new_objs)
+            self._update_instances(model, existing_objs, update_fields)
+            # Primary keys are required to set relations
+            for obj, many_to_many in instances:
+                if not many_to_many:
+                    continue
+                if obj.pk is None:
+                    obj.save()
+                for field_name, pks in many_to_many.items():
+                    model._meta.get_field(field_name).save_form_data(obj, pks)
+        return (len(instances) - len(existing_objs), len(existing_objs))
+
+    def _get_upsert_fields(self, model, upsert_on):
+        """
+        Get model's fields named by ``--upsert-on``.
+
+        :raises CommandError: If a field doesn't exist or isn't concrete
+        """
+        fields = []
+        for name in upsert_on or ():
+            try:
+                field = model._meta.get_field(name)
+            except models.FieldDoesNotExist:
+                raise CommandError("Field '%s' doesn't exist" % name)
+            if not field.concrete or field.many_to_many:
+                raise CommandError("Can't upsert on '%s'" % name)
+            fields.append(field)
+        return fields
+
+    def _get_upsert_key(self, fields, record):
+        """
+        Get values of key ``fields`` from ``record`` converted as Python
+        values, or ``None`` if one is missing or unvalid.
+        """
+        if not fields:
+            return None
+        key = []
+        for field in fields:
+            value = record.get(field.name)
+            if value is None or value == '':
+                return None
+            try:
+                key.append(field.to_python(value))
+            except ValidationError:
+                return None
+        return tuple(key)
+
+    def _get_existing(self, model, fields, records):
+        """
+        Get existing instances with the same values of key ``fields`` than
+        ``records``, with one query.
+
+        :returns: Instance or ``None`` for each record
+        :rtype: ``list``
+        """
+        keys = [self._get_upsert_key(fields, record) for record in records]
+        lookups = [key for key in keys if key is not None]
+        if not lookups:
+            return [None] * len(records)
+        # Matching each column gives a superset of keys, filtered below
+        filters = dict([
+            ('%s__in' % field.attname, set([key[i] for key in lookups]))
+            for i, field in enumerate(fields)
+        ])
+        m2m_names = [f.name for f in model._meta.many_to_many]
+        queryset = model.objects.filter(**filters)\
+            .prefetch_related(*m2m_names)
+        existing = dict([
+            (tuple([getattr(obj, field.attname) for field in fields]), obj)
+            for obj in queryset
+        ])
+        instances = []
+        used = set()
+        for key in keys:
+            obj = existing.get(key)
+            # Duplicated records must not change the same instance
+            if obj is not None and key in used:
+                obj = copy.deepcopy(obj)
+            used.add(key)
+            instances.append(obj)
+        return instances
+
+    def _split_many_to_many(self, model, data):
+        """
+        Split values of ``ManyToManyField`` in ``data`` into lists of
+        primary keys, from ``','`` separated strings.
+        """
+        for field_name, value in data.items():
+            try:
+                modelfield = model._meta.get_field(field_name)
+            except models.FieldDoesNotExist:
+                continue
+            if isinstance(modelfield, models.ManyToManyField) and \
+                    isinstance(value, six.string_types):
+                data[field_name] = value.split(',') if value else []
+
+    def _get_form_errors(self, form):
+        """
+        Get errors of an unvalid ``form`` as ``'field: error'`` lines.
+        """
+        return '\n'.join([
+            ('%s: %s' % (field, err))
+            for field in form.errors
+            for err in form.errors[field]
+        ])
+
+    def _update(self, modeladmin, fields, filters, filefields, confirm=True,
+                batch_size=cli_settings.BATCH_SIZE, throttle=None,
+                validate=False):
         """
         Update one or more fields of all instances filtered.
 
@@ -315,16 +1460,38 @@ class Command(BaseCommand):
         :param filefields: File fields to update
         :type filefields: ``dict``
 
-        :param confirm: Ask confirmation before make operation
+        :param confirm: Ask confirmation before make operation, if ``False``
+                        instances are updated by batches
         :type confirm: ``bool``
 
+        :param batch_size: Number of instances updated between pauses
+        :type batch_size: ``int``
+
+        :param throttle: Pace of batches
+        :type throttle: :class:`admin_cli.throttle.Throttle`
+
+        :param validate: Validate instances with ModelAdmin's form before
+                         writing them, requires ``confirm=False``
+        :type validate: ``bool``
+
         :raises CommandError: If data is unvalid or files are unfoundable
         """
+        throttle = throttle or Throttle()
+        if validate:
+            if confirm or filefields:
+                raise CommandError("Validated update requires --noinput and "
+                                   "doesn't support files")
+            return self._validated_update(modeladmin, fields, filters,
+                                          batch_size, throttle)
         for filename, path in filefields.items():
             try:
                 fields[filename] = File(open(path, 'rb'))
             except IOError as err:
                 raise CommandError(err.args[0])
+        if not confirm:
+            return self._bulk_update(modeladmin, fields, filters, batch_size,
+                                     throttle)
+        pending = 0
         for obj in modeladmin.model.objects.filter(**filters):
             if confirm:
                 res = raw_input("Update '%s' ? [Yes|No|All|Cancel] " % obj)\
@@ -335,6 +1502,11 @@ class Command(BaseCommand):
                     break
                 elif res.startswith('a'):
                     confirm = False
+            if pending >= batch_size:
+                throttle.add(pending)
+                self._write_progress('Updated', throttle)
+                pending = 0
+                throttle.wait()
             try:
                 filtr = {obj._meta.pk.name: getattr(obj, obj._meta.pk.name)}
                 modeladmin.model.objects.filter(**filtr).update(**fields)
@@ -343,14 +1515,188 @@ class Command(BaseCommand):
             except Exception as err:
                 msg = "%s: %s" % (err.__class__.__name__, err.args[0])
                 self.stderr.write(msg)
+            pending += 1
+        if pending:
+            throttle.add(pending)
+            self._write_progress('Updated', throttle)
+
+    def _bulk_update(self, modeladmin, fields, filters, batch_size,
+                     throttle):
+        """
+        Update instances filtered with one statement by batch of primary
+        keys, and write number of updated instances. Instances are only
+        written if verbosity is above 1.
+
+        :raises CommandError: If a batch fails, with the number of rows
+                              updated by previous batches, which are kept
+        """
+        model = modeladmin.model
+        queryset = model.objects.filter(**filters).order_by('pk')
+        label = '%s.%s' % (model._meta.app_label, model._meta.object_name)
+        last_pk = None
+        try:
+            while True:
+                if not batch_size:
+                    count = queryset.update(**fields)
+                    throttle.add(count)
+                    break
+                batch = queryset if last_pk is None \
+                    else queryset.filter(pk__gt=last_pk)
+                pks = list(batch.values_list('pk', flat=True)[:batch_size])
+                if not pks:
+                    break
+                throttle.wait()
+                count = model.objects.filter(pk__in=pks).update(**fields)
+                last_pk = pks[-1]
+                throttle.add(count)
+                self._write_progress('Updated', throttle)
+                if self.verbosity > 1:
+                    for obj in model.objects.filter(pk__in=pks):
+                        self.stdout.write("Updated '%s'" % obj)
+        except Exception as err:
+            raise CommandError("%s: %s (%i '%s' already updated)" % (
+                err.__class__.__name__, err, throttle.rows, label))
+        self.stdout.write("Updated %i '%s'" % (throttle.rows, label))
+
+    def _validated_update(self, modeladmin, fields, filters, batch_size,
+                          throttle):
+        """
+        Validate each instance filtered with the ModelAdmin's change form,
+        write valid instances by batches and unvalid ones on stderr.
+        """
+        for name, value in fields.items():
+            if not isinstance(value, six.string_types):
+                raise CommandError("Expression of '%s' can't be validated "
+                                   "by form" % name)
+        model = modeladmin.model
+        label = '%s.%s' % (model._meta.app_label, model._meta.object_name)
+        m2m_names = [f.name for f in model._meta.many_to_many]
+        queryset = model.objects.filter(**filters).order_by('pk')\
+            .prefetch_related(*m2m_names)
+        values = dict(fields)
+        self._split_many_to_many(model, values)
+        form_class = None
+        invalid = 0
+        last_pk = None
+        while True:
+            batch = queryset if last_pk is None \
+                else queryset.filter(pk__gt=last_pk)
+            objs = list(batch[:batch_size] if batch_size else batch)
+            if not objs:
+                break
+            last_pk = objs[-1].pk
+            forms = []
+            for obj in objs:
+                if form_class is None:
+                    form_class = modeladmin.get_form(get_false_request(), obj)
+                data = model_to_dict(obj, fields=list(form_class.base_fields))
+                data.update(values)
+                form = form_class(data=data, instance=obj)
+                if form.is_valid():
+                    forms.append(form)
+                    continue
+                invalid += 1
+                self.stderr.write("Invalid '%s':\n%s" % (
+                    obj, self._get_form_errors(form)))
+            if forms:
+                throttle.wait()
+                self._save_forms(model, forms)
+                throttle.add(len(forms))
+                self._write_progress('Updated', throttle)
+            if not batch_size:
+                break
+        self.stdout.write("Updated %i '%s'" % (throttle.rows, label))
+        if invalid:
+            self.stdout.write("Invalid %i '%s'" % (invalid, label))
+
+    def _save_forms(self, model, forms):
+        """
+        Write instances of valid change ``forms`` with one ``UPDATE`` and
+        their many-to-many relations, in one transaction.
+        """
+        concrete_names = [f.name for f in model._meta.concrete_fields]
+        update_fields = sorted(set([
+            name for form in forms for name in form.changed_data
+            if name in concrete_names
+        ]))
+        objs = [form.save(commit=False) for form in forms]
+        with transaction.atomic(using=router.db_for_write(model)):
+            self._update_instances(model, objs, update_fields)
+            for form in forms:
+                form.save_m2m()
+        if self.verbosity > 1:
+            for obj in objs:
+                self.stdout.write("Updated '%s'" % obj)
+
+    def _update_instances(self, model, objs, field_names):
+        """
+        Write fields of existing ``objs`` with one ``UPDATE`` by as many of
+        them as database accepts parameters, setting each column with a
+        ``CASE`` on primary keys.
+
+        :param field_names: Names of concrete fields written
+        :type field_names: ``list`` of ``str``
+
+        :returns: Number of updated rows
+        :rtype: ``int``
+        """
+        if not objs or not field_names:
+            return 0
+        fields = [model._meta.get_field(name) for name in field_names]
+        db = router.db_for_write(model)
+        # Each object has its primary key and its value in each CASE, and
+        # its primary key in WHERE
+        params = ['pk'] * (2 * len(fields) + 1)
+        batch_size = max(connections[db].ops.bulk_batch_size(params, objs),
+                         1)
+        updated = 0
+        for start in range(0, len(objs), batch_size):
+            batch = objs[start:start + batch_size]
+            values = {}
+            for field in fields:
+                whens = [
+                    models.When(pk=obj.pk, then=models.Value(
+                        getattr(obj, field.attname), output_field=field))
+                    for obj in batch
+                ]
+                values[field.attname] = models.Case(*whens,
+                                                    output_field=field)
+            updated += model._default_manager.using(db).filter(
+                pk__in=[obj.pk for obj in batch]).update(**values)
+        return updated
+
+    def _parse_update_fields(self, fields):
+        """
+        Get values of updated fields from ``'name=value'`` strings, values
+        calling a function as ``'F(name)+1'`` are database expressions.
+
+        :param fields: Fields to update as ``'name=value'``
+        :type fields: ``list`` of ``str``
+
+        :returns: Values or expressions by field's name
+        :rtype: ``dict``
+
+        :raises CommandError: If an expression is unvalid
+        """
+        fields_dict = {}
+        for field in fields:
+            name, value = field.split('=', 1)
+            try:
+                fields_dict[name] = parse_value(value)
+            except ExpressionError as err:
+                raise CommandError("%s: %s" % (name, err))
+        return fields_dict
 
-    def _describe(self, modeladmin):
+    def _describe(self, modeladmin, exact=False):
         """
-        Write description of a :class:`admin.ModelAdmin`, with model's fields
-        and actions.
+        Write description of a :class:`admin.ModelAdmin`, with model's
+        fields, table's indexes and statistics, and actions.
 
         :param modeladmin: ModelAdmin to describe
         :type modeladmin: :class:`admin.ModelAdmin`
+
+        :param exact: Count rows instead of estimating them
+        :type exact: ``bool``
         """
         instance = modeladmin.model()
         columns = ('Name (Verbose)', 'Type', 'Null', 'Blank', 'Choices',
@@ -369,10 +1715,51 @@ class Command(BaseCommand):
                 str(field.choices)[:20],
                 self._get_field_value(modeladmin, field.name, instance),
                 field.help_text))
+        self.stdout.write('\n')
+        self._get_indexes(modeladmin)
+        self.stdout.write('\n')
+        self._get_stats(modeladmin, exact)
         if modeladmin.actions:
             self.stdout.write('\n')
             self._get_actions(modeladmin)
 
+    def _get_indexes(self, modeladmin):
+        """
+        Write indexes of model's table, read from database.
+
+        :param modeladmin: ModelAdmin of model
+        :type modeladmin: :class:`admin.ModelAdmin`
+        """
+        columns = ('Name', 'Columns', 'Type')
+        row_template = '{!s:30} {!s:30} {!s:12}'
+        self.stdout.write('INDEXES:')
+        self.stdout.write(row_template.format(*columns))
+        for name, index_columns, kind in get_indexes(modeladmin.model):
+            self.stdout.write(row_template.format(
+                name, ', '.join([six.text_type(c) for c in index_columns]),
+                kind))
+
+    def _get_stats(self, modeladmin, exact=False):
+        """
+        Write number of rows and sizes of model's table, estimated by
+        database if it can.
+
+        :param modeladmin: ModelAdmin of model
+        :type modeladmin: :class:`admin.ModelAdmin`
+
+        :param exact: Count rows instead of estimating them
+        :type exact: ``bool``
+        """
+        rows, estimated, table_size, indexes_size = get_table_stats(
+            modeladmin.model, exact)
+        row_template = '{!s:30} {!s:30}'
+        self.stdout.write('STATS:')
+        self.stdout.write(row_template.format(
+            'Rows', '~%i (estimated)' % rows if estimated else rows))
+        for name, size in (('Table size', table_size),
+                           ('Indexes size', indexes_size)):
+            self.stdout.write(row_template.format(name, format_size(size)))
+
     def _get_actions(self, modeladmin):
         """
         Write modeladmin's custom actions.
@@ -384,11 +1771,111 @@ class Command(BaseCommand):
         row_template = '{!s:30} {!s:30}'
         self.stdout.write('ACTIONS:')
         self.stdout.write(row_template.format(*columns))
-        for name, action_details in modeladmin.get_actions(FALSE_REQ).items():
+        actions = modeladmin.get_actions(get_false_request())
+        for name, action_details in actions.items():
             obj, name, verbose = action_details
             self.stdout.write(row_template.format(
                 name, getattr(obj, 'short_description', '')))
 
+    def _explain(self, modeladmin, action, fields=[], filters={}, orders=[],
+                 group_by=[], aggregates={}, limit=None, after=None,
+                 analyze=False):
+        """
+        Write the SQL made by an action and the plan of its selection of
+        rows given by database, without running the action. Deletion is
+        made by batches of primary keys, cascades aren't written.
+
+        :param action: ``'list'``, ``'count'``, ``'update'`` or ``'delete'``
+        :type action: ``str``
+
+        :param fields: Fields listed, or updated as ``'name=value'``
+        :type fields: ``list`` of ``str``
+
+        :param analyze: Run the selection to get its actual costs
+        :type analyze: ``bool``
+
+        :raises CommandError: If action or plan can't be explained
+        """
+        statement = params = None
+        queryset = modeladmin.model.objects.filter(**filters)
+        if action == 'list':
+            queryset = self._get_list_queryset(
+                modeladmin, fields or modeladmin.list_display, filters,
+                orders, limit, after)[0]
+            if limit:
+                queryset = queryset[:limit]
+        elif action == 'count':
+            queryset, expressions = self._get_count_queryset(
+                modeladmin, filters, group_by, aggregates)
+            if not group_by:
+                queryset = get_aggregate_queryset(queryset, expressions)
+        elif action == 'update':
+            try:
+                statement, params = get_update_sql(
+                    queryset, self._parse_update_fields(fields))
+            except FieldError:
+                # Many-to-many fields are saved instance by instance
+                statement = None
+        elif action == 'delete':
+            opts = modeladmin.model._meta
+            quote_name = connections[queryset.db].ops.quote_name
+            statement = 'DELETE FROM %s WHERE %s IN (...)' % (
+                quote_name(opts.db_table), quote_name(opts.pk.column))
+            queryset = queryset.order_by('pk').values_list('pk', flat=True)
+        else:
+            raise CommandError("Can't explain '%s' action" % action)
+        try:
+            plan = explain(queryset, analyze)
+        except ExplainError as err:
+            raise CommandError(err.args[0])
+        if statement is not None:
+            self._write_sql('SQL:', statement, params)
+        self._write_sql('SELECTION:' if statement is not None else 'SQL:',
+                        *get_sql(queryset))
+        self.stdout.write('PLAN:')
+        self.stdout.write(plan)
+
+    def _write_sql(self, title, statement, params):
+        """
+        Write a SQL statement under ``title``, followed by its parameters
+        if it has any.
+        """
+        self.stdout.write(title)
+        self.stdout.write(statement)
+        if params:
+            self.stdout.write('PARAMS:')
+            self.stdout.write(format_params(params))
+
+    def _check_scan(self, model, lookups):
+        """
+        Stop if filtering or ordering by ``lookups`` would scan a table with
+        more rows than ``ADMIN_CLI_SCAN_THRESHOLD``, because their columns
+        aren't indexed. Nothing is checked on databases without statistics
+        of tables.
+
+        :param model: Model filtered or ordered
+        :type model: :class:`models.Model`
+
+        :param lookups: Lookups of filters and orderings
+        :type lookups: ``list`` of ``str``
+
+        :raises CommandError: If a large table would be scanned
+        """
+        threshold = cli_settings.SCAN_THRESHOLD
+        if not threshold:
+            return
+        # Counting rows would be the scan, tables are only checked if
+        # database has statistics
+        rows = estimate_row_count(model)
+        if rows is None or rows <= threshold:
+            return
+        unindexed = get_unindexed_fields(model, lookups)
+        if unindexed:
+            raise CommandError(
+                "'%s' isn't indexed, about %i rows of '%s' would be scanned,"
+                " use --force to run anyway" % (
+                    "', '".join(unindexed), rows, model._meta.db_table))
+
     def _user_has_access(self, mode):
         """
         Checks if system user has access defined in ``django.conf.settings``.
@@ -414,35 +1901,196 @@ class Command(BaseCommand):
         raise CommandError("User '%s' (%s) isn't registered" % (
                            cur_user, cur_uid))
 
+    @contextmanager
+    def _count_queries(self, enabled):
+        """
+        Write the number of SQL queries made inside the block.
+
+        :param enabled: Count queries, do nothing if ``False``
+        :type enabled: ``bool``
+        """
+        if not enabled:
+            yield
+            return
+        counter = Profiler()
+        with counter.count_queries(connection):
+            yield
+        self.stderr.write("%i queries" % counter.queries)
+
+    @contextmanager
+    def _profile(self, enabled, out=None):
+        """
+        Profile the block and write the report of :attr:`profiler`.
+
+        :param enabled: Profile, do nothing if ``False`` and no ``out``
+        :type enabled: ``bool``
+
+        :param out: Path of a file to write :mod:`cProfile` statistics
+        :type out: ``str``
+        """
+        if not (enabled or out):
+            yield
+            return
+        self.profiler = Profiler(out)
+        try:
+            with self.profiler.run(connection):
+                yield
+        finally:
+            profiler, self.profiler = self.profiler, None
+        profiler.write_report(self.stderr)
+
+    @contextmanager
+    def _phase(self, name):
+        """
+        Add the time spent in the block to phase ``name`` if profiling.
+        """
+        if self.profiler is None:
+            yield
+            return
+        with self.profiler.phase(name):
+            yield
+
+    def _shell(self, stdin=None, script=None, atomic=False,
+               keep_going=False, stdout=None, stderr=None):
+        """
+        Run commands read from ``stdin`` until ``exit`` or end of input, or
+        run the lines of a ``script``.
+
+        :param stdin: Stream of commands, standard input by default
+        :type stdin: ``file``
+
+        :param script: Path of script, ``'-'`` for ``stdin``
+        :type script: ``str``
+
+        :param atomic: Run script in a transaction rolled back if a line
+                       fails
+        :type atomic: ``bool``
+
+        :param keep_going: Run script's lines after a failed one
+        :type keep_going: ``bool``
+
+        :param stdout: Stream of commands' output, standard output by
+                       default, not wrapped as commands wrap it themselves
+        :type stdout: ``file``
+
+        :param stderr: Stream of commands' errors, standard error by
+                       default
+        :type stderr: ``file``
+
+        :raises CommandError: If a line of script fails
+        """
+        stdin = stdin or sys.stdin
+        shell = Shell(Command(), stdin, stdout or sys.stdout,
+                      stderr or sys.stderr)
+        if script is None:
+            shell.cmdloop()
+            return
+        try:
+            lines = stdin if script == '-' else open_file(script)
+        except IOError as err:
+            raise CommandError(err.args[-1])
+        try:
+            if atomic:
+                with transaction.atomic():
+                    errors = shell.run_script(lines, keep_going,
+                                              savepoints=True)
+                    if errors:
+                        transaction.set_rollback(True)
+            else:
+                errors = shell.run_script(lines, keep_going)
+        finally:
+            if lines is not stdin:
+                lines.close()
+        if errors:
+            raise CommandError("%i line(s) failed%s" % (
+                errors, ', script rolled back' if atomic else ''))
+
     def handle(self, *args, **opts):
-        model_name = opts['model'][0] if django.VERSION >= (1, 8) else args[0]
-        action = opts['action'] if django.VERSION >= (1, 8) else args[1]
+        model_name = opts['model'][0]
+        action = opts['action']
+        if model_name == 'shell':
+            return self._shell(opts.get('stdin'), opts.get('script'),
+                               opts.get('atomic'), opts.get('keep_going'),
+                               opts.get('stdout'), opts.get('stderr'))
+        if action is None:
+            raise CommandError("Action is required, choose from: %s"
+                               % ', '.join(ACTIONS))
         fields = opts.get('field', []) or []
         filters = opts.get('filter', []) or []
         filefields = opts.get('file', []) or []
         orders = [o.replace('~', '-') for o in (opts.get('order', []) or [])]
         confirm = not opts.get('noinput', False)
-        model = self._get_model(model_name)
-        modeladmin = REGISTRY[model]
-        if action == 'list':
-            self._user_has_access('R')
-            filters_dict = dict([f.split('=') for f in filters])
-            self._list(modeladmin, fields, filters_dict, orders)
-        elif action == 'delete':
-            self._user_has_access('W')
-            filters_dict = dict([f.split('=') for f in filters])
-            self._delete(modeladmin, filters_dict, confirm)
-        elif action == 'add':
-            self._user_has_access('W')
-            filefields_dict = dict([f.split('=') for f in filefields])
-            self._add(modeladmin, fields, filefields_dict)
-        elif action == 'update':
-            self._user_has_access('W')
-            fields_dict = dict([f.split('=') for f in fields])
-            filters_dict = dict([f.split('=') for f in filters])
-            filefields_dict = dict([f.split('=') for f in filefields])
-            self._update(modeladmin, fields_dict, filters_dict,
-                         filefields_dict, confirm)
-        elif action == 'describe':
-            self._user_has_access('R')
-            self._describe(modeladmin)
+        self.verbosity = int(opts.get('verbosity', 1))
+        chunk_size = opts.get('chunk_size')
+        if chunk_size is None:
+            chunk_size = cli_settings.CHUNK_SIZE
+        buffer_size = opts.get('buffer_size')
+        if buffer_size is None:
+            buffer_size = cli_settings.BUFFER_SIZE
+        batch_size = opts.get('batch_size')
+        if batch_size is None:
+            batch_size = cli_settings.BATCH_SIZE
+        upsert_on = opts.get('upsert_on')
+        upsert_on = upsert_on.split(',') if upsert_on else None
+        throttle = Throttle(opts.get('sleep_between_batches'),
+                            opts.get('max_rows_per_second'))
+        self.site_name = opts.get('site')
+        with self._profile(opts.get('profile'), opts.get('profile_out')), \
+                self._count_queries(opts.get('show_queries')):
+            with self._phase('Model resolution'):
+                model = self._get_model(model_name)
+                modeladmin = self._get_modeladmin(model)
+            lookups = [f.split('=')[0] for f in filters] + orders
+            if lookups and action in ('list', 'count', 'update', 'delete') \
+                    and not (opts.get('force') or opts.get('explain')):
+                # Unallowed users mustn't learn about tables' sizes
+                self._user_has_access('W' if action in ('update', 'delete')
+                                      else 'R')
+                with self._phase('Index check'):
+                    self._check_scan(model, lookups)
+            if opts.get('explain'):
+                self._user_has_access('R')
+                filters_dict = dict([f.split('=') for f in filters])
+                aggregates = dict([(n, opts.get(n) or []) for n in AGGREGATES])
+                self._explain(modeladmin, action, fields, filters_dict,
+                              orders, opts.get('group_by') or [], aggregates,
+                              opts.get('limit'), opts.get('after'),
+                              opts.get('analyze', False))
+            elif action == 'list':
+                self._user_has_access('R')
+                filters_dict = dict([f.split('=') for f in filters])
+                self._list(modeladmin, fields, filters_dict, orders,
+                           chunk_size, opts.get('output_format') or 'table',
+                           buffer_size, opts.get('limit'), opts.get('after'))
+            elif action == 'delete':
+                self._user_has_access('W')
+                filters_dict = dict([f.split('=') for f in filters])
+                self._delete(modeladmin, filters_dict, confirm, batch_size,
+                             throttle)
+            elif action == 'add':
+                self._user_has_access('W')
+                filefields_dict = dict([f.split('=') for f in filefields])
+                self._add(modeladmin, fields, filefields_dict, upsert_on)
+            elif action == 'update':
+                self._user_has_access('W')
+                fields_dict = self._parse_update_fields(fields)
+                filters_dict = dict([f.split('=') for f in filters])
+                filefields_dict = dict([f.split('=') for f in filefields])
+                self._update(modeladmin, fields_dict, filters_dict,
+                             filefields_dict, confirm, batch_size, throttle,
+                             opts.get('validate', False))
+            elif action == 'describe':
+                self._user_has_access('R')
+                self._describe(modeladmin, opts.get('exact', False))
+            elif action == 'import':
+                self._user_has_access('W')
+                self._import(modeladmin, opts.get('input') or '-',
+                             opts.get('output_format'), opts.get('rejects'),
+                             batch_size, opts.get('workers') or 0, upsert_on)
+            elif action == 'count':
+                self._user_has_access('R')
+                filters_dict = dict([f.split('=') for f in filters])
+                aggregates = dict([(n, opts.get(n) or []) for n in AGGREGATES])
+                self._count(modeladmin, filters_dict,
+                            opts.get('group_by') or [], aggregates,
+                            opts.get('output_format') or 'table')
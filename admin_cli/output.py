@@ -0,0 +1,204 @@
+"""
+Writers used to output listed rows.
+"""
+import os
+import csv
+import signal
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import date, time
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+from django.utils import six
+from django.utils.encoding import force_str
+
+
+class BufferedStream(object):
+    """
+    Gather written lines and write them to ``stream`` by blocks of at least
+    ``buffer_size`` characters, instead of one write and flush by line.
+    Remaining lines are flushed when leaving the ``with`` block.
+
+    :param stream: Stream written, as a command's ``OutputWrapper``
+    """
+    def __init__(self, stream, buffer_size, ending='\n'):
+        self.stream = stream
+        self.buffer_size = buffer_size
+        self.ending = ending
+        self.buffer = []
+        self.size = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.flush()
+
+    def write(self, msg):
+        if not msg.endswith(self.ending):
+            msg += self.ending
+        self.buffer.append(msg)
+        self.size += len(msg)
+        if self.size >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        if not self.buffer:
+            return
+        data = force_str(''.join(self.buffer))
+        del self.buffer[:]
+        self.size = 0
+        self.stream.write(data)
+        self.stream.flush()
+
+    def discard(self):
+        """
+        Drop buffered lines after reader closed the pipe and send further
+        writes, such as interpreter's final flush, to ``os.devnull``.
+        """
+        del self.buffer[:]
+        self.size = 0
+        try:
+            devnull = os.open(os.devnull, os.O_WRONLY)
+            os.dup2(devnull, self.stream.fileno())
+        except (AttributeError, ValueError, EnvironmentError):
+            pass
+
+
+@contextmanager
+def exit_on_sigterm():
+    """
+    Raise ``SystemExit`` if process receives ``SIGTERM`` inside the block,
+    instead of being killed, so enclosing :class:`BufferedStream` flushes
+    its lines while the exception goes up. Nothing is changed outside of
+    main thread, where signal handlers can't be set.
+    """
+    def terminate(signum, frame):
+        raise SystemExit(128 + signum)
+    try:
+        previous = signal.signal(signal.SIGTERM, terminate)
+    except ValueError:
+        # Not in main thread
+        yield
+        return
+    try:
+        yield
+    finally:
+        # None if previous handler wasn't set from Python
+        signal.signal(signal.SIGTERM,
+                      signal.SIG_DFL if previous is None else previous)
+
+
+class TableWriter(object):
+    """
+    Write rows as human readable fixed-width columns.
+    """
+    #: Rows are given as text already formatted for display
+    raw = False
+
+    def __init__(self, stream, fields, names, widths):
+        self.stream = stream
+        self.names = names
+        self.row_template = ''.join(['{:%i}' % width for width in widths])
+
+    def write_header(self):
+        self.stream.write(self.row_template.format(*self.names))
+
+    def write_row(self, values):
+        self.stream.write(self.row_template.format(*values))
+
+
+class JSONLinesWriter(object):
+    """
+    Write rows as one JSON object per line, keyed by field's name.
+    """
+    raw = True
+
+    def __init__(self, stream, fields, names, widths):
+        self.stream = stream
+        self.fields = fields
+        self.encoder = DjangoJSONEncoder()
+
+    def write_header(self):
+        pass
+
+    def write_row(self, values):
+        row = OrderedDict(zip(self.fields, [to_python(v) for v in values]))
+        self.stream.write(self.encoder.encode(row))
+
+
+class CSVWriter(object):
+    """
+    Write rows as CSV with field's names as header.
+    """
+    raw = True
+    delimiter = ','
+
+    def __init__(self, stream, fields, names, widths):
+        self.fields = fields
+        # Writer makes one write by row, ended by the stream's own ending
+        self.writer = csv.writer(stream, delimiter=self.delimiter,
+                                 lineterminator='\n')
+
+    def write_header(self):
+        self.writer.writerow(self.fields)
+
+    def write_row(self, values):
+        self.writer.writerow([to_text(v) for v in values])
+
+
+class TSVWriter(CSVWriter):
+    """
+    Write rows as tab-separated values with field's names as header.
+    """
+    delimiter = '\t'
+
+
+WRITERS = OrderedDict((
+    ('table', TableWriter),
+    ('jsonl', JSONLinesWriter),
+    ('csv', CSVWriter),
+    ('tsv', TSVWriter),
+))
+
+
+#: Types written as they are in JSON
+JSON_SCALARS = (bool, float, type(None)) + six.integer_types + \
+    six.string_types
+
+
+def to_python(value):
+    """
+    Convert raw ``value`` to a type serializable in JSON, values which
+    aren't JSON's scalars, lists or objects are converted by
+    :func:`to_text`.
+    """
+    if isinstance(value, JSON_SCALARS):
+        return value
+    elif isinstance(value, models.Model):
+        return six.text_type(value)
+    elif isinstance(value, (list, tuple)):
+        return [to_python(v) for v in value]
+    elif isinstance(value, dict):
+        return OrderedDict([(k, to_python(v)) for k, v in value.items()])
+    return to_text(value)
+
+
+def to_text(value):
+    """
+    Convert raw ``value`` to text for delimited formats, with ISO-8601 dates
+    and empty string for ``None``.
+    """
+    if value is None:
+        return ''
+    elif isinstance(value, (date, time)):
+        value = value.isoformat()
+    elif isinstance(value, (list, tuple)):
+        value = ','.join([to_text(v) for v in value])
+    elif not isinstance(value, six.string_types):
+        value = six.text_type(value)
+    # Python 2's csv module only handles bytes
+    if six.PY2 and isinstance(value, six.text_type):  # pragma: no cover
+        value = value.encode('utf-8')
+    return value
@@ -0,0 +1,180 @@
+"""
+Measure of time spent by phases of a command, of SQL queries and of peak
+memory, used by ``--profile``.
+"""
+import sys
+import time
+import cProfile
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from django.db.backends.utils import CursorWrapper
+
+try:
+    import resource
+except ImportError:  # pragma: no cover
+    # Not available on Windows
+    resource = None
+
+
+class QueryCountingCursor(CursorWrapper):
+    """
+    Cursor adding its queries and their time to a :class:`Profiler`,
+    without keeping them like Django's debug cursor.
+    """
+    def __init__(self, cursor, db, profiler):
+        super(QueryCountingCursor, self).__init__(cursor, db)
+        self.profiler = profiler
+
+    def execute(self, sql, params=None):
+        start = self.profiler.clock()
+        try:
+            return super(QueryCountingCursor, self).execute(sql, params)
+        finally:
+            self.profiler.add_query(self.profiler.clock() - start)
+
+    def executemany(self, sql, param_list):
+        start = self.profiler.clock()
+        try:
+            return super(QueryCountingCursor, self).executemany(sql,
+                                                                param_list)
+        finally:
+            self.profiler.add_query(self.profiler.clock() - start)
+
+
+class Profiler(object):
+    """
+    Accumulate time spent by named phases. Phases are measured with
+    :meth:`phase` blocks, or by wrapping functions and iterators called for
+    each row, so nothing is measured when profiling is disabled.
+
+    :param out: Path of a file to write :mod:`cProfile` statistics
+    :type out: ``str``
+
+    :param clock: Function giving current time in seconds
+    """
+    def __init__(self, out=None, clock=None):
+        self.out = out
+        self.clock = clock or time.time
+        self.timings = OrderedDict()
+        self.queries = 0
+        self.query_time = 0.0
+        self.total = 0.0
+
+    def add(self, name, elapsed):
+        self.timings[name] = self.timings.get(name, 0.0) + elapsed
+
+    def add_query(self, elapsed):
+        self.queries += 1
+        self.query_time += elapsed
+
+    @contextmanager
+    def phase(self, name):
+        start = self.clock()
+        try:
+            yield
+        finally:
+            self.add(name, self.clock() - start)
+
+    def timed(self, name, func):
+        """
+        Get ``func`` adding time spent by each call to phase ``name``.
+        """
+        def wrapper(*args, **kwargs):
+            start = self.clock()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.add(name, self.clock() - start)
+        return wrapper
+
+    def timed_iter(self, name, iterable):
+        """
+        Iterate over ``iterable`` adding time spent to get each item to
+        phase ``name``.
+        """
+        iterator = iter(iterable)
+        while True:
+            start = self.clock()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                self.add(name, self.clock() - start)
+                return
+            self.add(name, self.clock() - start)
+            yield item
+
+    @contextmanager
+    def run(self, connection):
+        """
+        Profile the block: total time, SQL queries made with
+        ``connection`` and :mod:`cProfile` statistics if :attr:`out` is
+        set.
+        """
+        profile = cProfile.Profile() if self.out else None
+        start = self.clock()
+        with self.count_queries(connection):
+            if profile is not None:
+                profile.enable()
+            try:
+                yield self
+            finally:
+                if profile is not None:
+                    profile.disable()
+                self.total = self.clock() - start
+        if profile is not None:
+            profile.dump_stats(self.out)
+
+    @contextmanager
+    def count_queries(self, connection):
+        """
+        Add the queries made with ``connection`` inside the block to
+        :attr:`queries` and :attr:`query_time`, by wrapping the cursors it
+        makes, debug or not. Blocks can be nested.
+        """
+        previous = dict([(name, getattr(connection, name))
+                         for name in ('make_cursor', 'make_debug_cursor')])
+        for name, make in previous.items():
+            setattr(connection, name, self._wrap_cursors(make, connection))
+        try:
+            yield
+        finally:
+            for name, make in previous.items():
+                # Methods are restored by removing wrappers, wrappers of an
+                # enclosing block are put back
+                if getattr(make, '__self__', None) is not None:
+                    delattr(connection, name)
+                else:
+                    setattr(connection, name, make)
+
+    def _wrap_cursors(self, make_cursor, connection):
+        return lambda cursor: QueryCountingCursor(make_cursor(cursor),
+                                                  connection, self)
+
+    def get_peak_memory(self):
+        """
+        Get peak resident memory of process in bytes, ``None`` if unknown.
+        """
+        if resource is None:  # pragma: no cover
+            return None
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Kilobytes on Linux, bytes on macOS
+        return peak if sys.platform == 'darwin' else peak * 1024
+
+    def write_report(self, stream):
+        """
+        Write timings of phases, SQL queries and peak memory.
+        """
+        row_template = '{:20} {}'
+        stream.write('Profile:')
+        for name, elapsed in self.timings.items():
+            stream.write(row_template.format(name, '%.3fs' % elapsed))
+        stream.write(row_template.format('Total', '%.3fs' % self.total))
+        stream.write(row_template.format(
+            'SQL queries', '%i (%.3fs)' % (self.queries, self.query_time)))
+        peak = self.get_peak_memory()
+        stream.write(row_template.format(
+            'Peak memory',
+            'N/A' if peak is None else '%.1f MiB' % (peak / 1024.0 ** 2)))
+        if self.out:
+            stream.write(row_template.format('Statistics', self.out))
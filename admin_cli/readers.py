@@ -0,0 +1,145 @@
+"""
+Readers of records to import, and writers of rejected records in the same
+format.
+"""
+import io
+import csv
+import json
+import sys
+from collections import OrderedDict
+
+from django.utils import six
+
+
+class MalformedRecord(OrderedDict):
+    """
+    Empty record standing for a line which can't be parsed, so it's
+    rejected in order with the error of its line.
+
+    :param line_number: Number of line in file, from 1
+    :type line_number: ``int``
+
+    :param error: Error of parser
+    :type error: ``str``
+    """
+    def __init__(self, line_number=None, error=None):
+        super(MalformedRecord, self).__init__()
+        self.line_number = line_number
+        self.error = error
+
+    @property
+    def errors(self):
+        return {'__all__': ["Malformed line %i: %s" % (self.line_number,
+                                                       self.error)]}
+
+
+class JSONLinesReader(object):
+    """
+    Read records written as one JSON object per line, lines which aren't
+    JSON objects are read as :class:`MalformedRecord`.
+    """
+    def __init__(self, stream):
+        self.stream = stream
+
+    def __iter__(self):
+        for line_number, line in enumerate(self.stream, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line, object_pairs_hook=OrderedDict)
+            except ValueError as err:
+                yield MalformedRecord(line_number, six.text_type(err))
+                continue
+            if not isinstance(record, dict):
+                yield MalformedRecord(line_number, "Not an object")
+                continue
+            yield record
+
+    def get_rejects_writer(self, stream):
+        return JSONLinesRejectsWriter(stream)
+
+
+class JSONLinesRejectsWriter(object):
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write(self, record, errors):
+        record = OrderedDict(record)
+        record['errors'] = errors
+        self.stream.write(six.text_type(json.dumps(record) + '\n'))
+
+
+class CSVReader(object):
+    """
+    Read records from CSV with field's names as header.
+    """
+    delimiter = ','
+
+    def __init__(self, stream):
+        self.reader = csv.DictReader(stream, delimiter=self.delimiter)
+
+    def __iter__(self):
+        for row in self.reader:
+            # Python 2's csv module only handles bytes
+            if six.PY2:  # pragma: no cover
+                row = dict([(k.decode('utf-8'), v.decode('utf-8'))
+                            for k, v in row.items()])
+            yield row
+
+    def get_rejects_writer(self, stream):
+        return CSVRejectsWriter(stream, self.reader.fieldnames,
+                                self.delimiter)
+
+
+class CSVRejectsWriter(object):
+    def __init__(self, stream, fieldnames, delimiter):
+        fieldnames = list(fieldnames or []) + ['errors']
+        self.stream = stream
+        self.writer = csv.DictWriter(stream, fieldnames, delimiter=delimiter,
+                                     lineterminator='\n',
+                                     extrasaction='ignore')
+        self.writer.writeheader()
+
+    def write(self, record, errors):
+        record = dict(record)
+        record['errors'] = '; '.join([
+            '%s: %s' % (field, ' '.join(errs))
+            for field, errs in errors.items()
+        ])
+        if six.PY2:  # pragma: no cover
+            record = dict([(k, v.encode('utf-8'))
+                           for k, v in record.items()])
+        self.writer.writerow(record)
+
+
+class TSVReader(CSVReader):
+    """
+    Read records from tab-separated values with field's names as header.
+    """
+    delimiter = '\t'
+
+
+READERS = OrderedDict((
+    ('jsonl', JSONLinesReader),
+    ('csv', CSVReader),
+    ('tsv', TSVReader),
+))
+EXTENSIONS = {
+    '.jsonl': 'jsonl',
+    '.json': 'jsonl',
+    '.csv': 'csv',
+    '.tsv': 'tsv',
+}
+
+
+def open_file(path, mode='r'):
+    """
+    Open ``path`` as text for csv and json modules, ``'-'`` is standard
+    input or output.
+    """
+    if path == '-':
+        return sys.stdin if mode == 'r' else sys.stdout
+    if six.PY2:  # pragma: no cover
+        return open(path, mode + 'b')
+    return io.open(path, mode, encoding='utf-8', newline='')
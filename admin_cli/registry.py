@@ -0,0 +1,112 @@
+"""
+Models registered in admin sites, indexed by model's name and by
+``app_label.model_name``.
+
+Sites are defined by ``ADMIN_CLI_SITES`` setting, as ``AdminSite`` or their
+dotted path by name, ``'default'`` is ``django.contrib.admin.site``.
+"""
+from django.utils import six
+from django.utils.module_loading import import_string
+
+from admin_cli import settings as cli_settings
+
+DEFAULT_SITE = 'default'
+#: Indexes by site, built once
+_INDEXES = {}
+
+
+class RegistryError(LookupError):
+    """Site or model can't be found, or model's name is ambiguous."""
+
+
+class RegistryIndex(object):
+    """
+    Index of models registered in an admin site.
+
+    :param registry: ModelAdmins by model, as ``AdminSite._registry``
+    :type registry: ``dict``
+    """
+    def __init__(self, registry):
+        self.registry = registry
+        self.registered = frozenset(registry)
+        self.models = {}
+        for model in registry:
+            opts = model._meta
+            for name in (opts.model_name,
+                         '%s.%s' % (opts.app_label, opts.model_name)):
+                self.models.setdefault(name, []).append(model)
+        self.names = sorted(self.models)
+
+    def __contains__(self, name):
+        return name in self.models
+
+    def get_model(self, name):
+        """
+        Get the model named ``name`` or ``app_label.name``.
+
+        :raises RegistryError: If model isn't registered or if several ones
+                               have this name
+        """
+        models = self.models.get(name.lower(), [])
+        if not models:
+            raise RegistryError("Can't find model '%s' in admin registry"
+                                % name)
+        if len(models) > 1:
+            raise RegistryError("Model '%s' is ambiguous, choose from: %s" % (
+                name, ', '.join(sorted([
+                    '%s.%s' % (m._meta.app_label, m._meta.model_name)
+                    for m in models
+                ]))))
+        return models[0]
+
+    def get_modeladmin(self, name):
+        """
+        Get the ``ModelAdmin`` of model named ``name`` or ``app_label.name``.
+
+        :raises RegistryError: If model can't be found
+        """
+        return self.registry[self.get_model(name)]
+
+
+def get_site(name=None):
+    """
+    Get the ``AdminSite`` named ``name`` in ``ADMIN_CLI_SITES``.
+
+    :raises RegistryError: If site isn't defined
+    """
+    name = name or DEFAULT_SITE
+    try:
+        site = cli_settings.SITES[name]
+    except KeyError:
+        raise RegistryError("Can't find site '%s', choose from: %s" % (
+            name, ', '.join(sorted(cli_settings.SITES))))
+    if isinstance(site, six.string_types):
+        site = import_string(site)
+    return site
+
+
+def get_index(site_name=None):
+    """
+    Get the index of models registered in site named ``site_name``, built
+    once and again only if models were registered or unregistered since.
+
+    :rtype: :class:`RegistryIndex`
+    """
+    registry = get_site(site_name)._registry
+    index = _INDEXES.get(id(registry))
+    if index is None or index.registry is not registry or \
+            index.registered != frozenset(registry):
+        index = _INDEXES[id(registry)] = RegistryIndex(registry)
+    return index
+
+
+def get_model_names():
+    """
+    Get names of models registered in every site.
+
+    :rtype: ``list`` of ``str``
+    """
+    names = set()
+    for site_name in cli_settings.SITES:
+        names.update(get_index(site_name).names)
+    return sorted(names)
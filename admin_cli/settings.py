@@ -1,3 +1,14 @@
+import os
+
 from django.conf import settings
 
 USERS = getattr(settings, 'ADMIN_CLI_USERS', {})
+CHUNK_SIZE = getattr(settings, 'ADMIN_CLI_CHUNK_SIZE', 2000)
+BUFFER_SIZE = getattr(settings, 'ADMIN_CLI_BUFFER_SIZE', 64 * 1024)
+BATCH_SIZE = getattr(settings, 'ADMIN_CLI_BATCH_SIZE', 1000)
+SCAN_THRESHOLD = getattr(settings, 'ADMIN_CLI_SCAN_THRESHOLD', 100000)
+HISTORY_FILE = getattr(settings, 'ADMIN_CLI_HISTORY_FILE',
+                       os.path.expanduser('~/.admin_cli_history'))
+SITES = getattr(settings, 'ADMIN_CLI_SITES', {
+    'default': 'django.contrib.admin.site',
+})
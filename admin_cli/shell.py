@@ -0,0 +1,189 @@
+"""
+Interactive shell running ``cli`` commands in one process, so Django's
+setup, admin registry and database connection are made once.
+"""
+import cmd
+import time
+import shlex
+
+from django.core.management.base import CommandError
+from django.db import transaction
+
+from admin_cli import settings as cli_settings
+from admin_cli.registry import get_model_names
+
+# Options followed by a field's name
+FIELD_OPTIONS = ('-f', '--field', '-F', '--filter', '-o', '--order',
+                 '--group-by', '--sum', '--avg', '--min', '--max')
+
+
+class Shell(cmd.Cmd):
+    """
+    Read lines as arguments of ``cli`` command, for example
+    ``user list -F is_staff=1``, and run them with the same command.
+
+    :param command: Command running lines
+    :type command: :class:`admin_cli.management.commands.cli.Command`
+
+    :param stdin: Stream of lines, a terminal is read with :mod:`readline`
+                  if it's available, imported only then
+    :param stdout: Stream of commands' output
+    :param stderr: Stream of commands' errors
+    """
+    intro = "Admin CLI shell, type 'help' for usage and 'exit' to quit."
+    prompt = 'cli> '
+    #: :mod:`readline` module, imported by :meth:`preloop`
+    readline = None
+
+    def __init__(self, command, stdin, stdout, stderr):
+        interactive = getattr(stdin, 'isatty', lambda: False)()
+        cmd.Cmd.__init__(self, stdin=stdin, stdout=stdout)
+        self.use_rawinput = interactive
+        if not interactive:
+            self.intro = None
+            self.prompt = ''
+        self.command = command
+        self.parser = command.create_parser('manage.py', 'cli')
+        self.stderr = stderr
+
+    def preloop(self):
+        if not self.use_rawinput:
+            return
+        try:
+            import readline
+        except ImportError:
+            return
+        self.readline = readline
+        try:
+            readline.read_history_file(cli_settings.HISTORY_FILE)
+        except (IOError, OSError):
+            pass
+
+    def postloop(self):
+        if self.readline is None:
+            return
+        try:
+            self.readline.write_history_file(cli_settings.HISTORY_FILE)
+        except (IOError, OSError):
+            pass
+
+    def emptyline(self):
+        # Default is to repeat the last command
+        pass
+
+    def default(self, line):
+        self.run(line)
+
+    def run(self, line):
+        """
+        Run a line of arguments with :attr:`command`.
+
+        :returns: ``True`` if command succeeded, else its error is written
+        :rtype: ``bool``
+        """
+        try:
+            argv = shlex.split(line)
+        except ValueError as err:
+            self.stderr.write("Error: %s\n" % err)
+            return False
+        if argv and argv[0] == 'shell':
+            self.stderr.write("Error: Already in shell\n")
+            return False
+        try:
+            options = self.parser.parse_args(argv)
+        except CommandError as err:
+            # Message is already prefixed by parser
+            self.stderr.write("%s\n" % err)
+            return False
+        except SystemExit:
+            # Help was written by parser
+            return False
+        kwargs = dict(options._get_kwargs())
+        kwargs.update(stdout=self.stdout, stderr=self.stderr,
+                      skip_checks=True)
+        args = kwargs.pop('args', ())
+        try:
+            self.command.execute(*args, **kwargs)
+        except Exception as err:
+            self.stderr.write("Error: %s\n" % err)
+            return False
+        return True
+
+    def run_script(self, lines, keep_going=False, savepoints=False):
+        """
+        Run lines of a script one after the other and write the time taken
+        by each of them. Empty lines and lines starting by ``'#'`` are
+        skipped.
+
+        :param lines: Lines of arguments
+        :type lines: iterator of ``str``
+
+        :param keep_going: Run next lines after an error instead of stopping
+        :type keep_going: ``bool``
+
+        :param savepoints: Run each line in a savepoint rolled back if it
+                           fails, to use inside a transaction
+        :type savepoints: ``bool``
+
+        :returns: Number of failed lines
+        :rtype: ``int``
+        """
+        errors = 0
+        for lineno, line in enumerate(lines, 1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            start = time.time()
+            sid = transaction.savepoint() if savepoints else None
+            succeeded = self.run(line)
+            if sid is not None and succeeded:
+                transaction.savepoint_commit(sid)
+            elif sid is not None:
+                transaction.savepoint_rollback(sid)
+            self.stderr.write("Line %i: %.3fs %s\n" % (
+                lineno, time.time() - start, 'OK' if succeeded else 'FAILED'))
+            if not succeeded:
+                errors += 1
+                if not keep_going:
+                    break
+        return errors
+
+    def do_help(self, arg):
+        """Write usage of command."""
+        self.parser.print_help(self.stdout)
+
+    def do_exit(self, arg):
+        """Quit shell."""
+        return True
+    do_quit = do_exit
+
+    def do_EOF(self, arg):
+        if self.use_rawinput:
+            self.stdout.write('\n')
+        return True
+
+    def completenames(self, text, *ignored):
+        names = get_model_names() + ['help', 'exit']
+        return [name for name in names if name.startswith(text)]
+
+    def completedefault(self, text, line, begidx, endidx):
+        words = line[:begidx].split()
+        if len(words) == 1:
+            from admin_cli.management.commands.cli import ACTIONS
+            return [a for a in ACTIONS if a.startswith(text)]
+        if words and words[-1] in FIELD_OPTIONS:
+            try:
+                model = self.command._get_model(words[0])
+            except CommandError:
+                return []
+            suffix = '=' if words[-1] in ('-f', '--field', '-F',
+                                          '--filter') else ''
+            return [f.name + suffix for f in model._meta.fields
+                    if f.name.startswith(text)]
+        if text.startswith('-'):
+            return sorted([
+                option for action in self.parser._actions
+                for option in action.option_strings
+                if option.startswith(text)
+            ])
+        return []
@@ -0,0 +1,50 @@
+"""
+Pacing of batch operations, used to not saturate database by writes.
+"""
+import time
+
+
+class Throttle(object):
+    """
+    Wait between batches of rows, for at least ``sleep`` seconds and as long
+    as needed to stay under ``max_rate`` rows per second.
+    """
+    def __init__(self, sleep=0, max_rate=None, clock=None, sleeper=None):
+        self.sleep = sleep or 0
+        self.max_rate = max_rate
+        self.clock = clock or time.time
+        self.sleeper = sleeper or time.sleep
+        self.start = self.clock()
+        self.rows = 0
+
+    @property
+    def enabled(self):
+        return bool(self.sleep or self.max_rate)
+
+    @property
+    def rate(self):
+        """Rows per second since start, waits included."""
+        elapsed = self.clock() - self.start
+        return self.rows / elapsed if elapsed > 0 else float(self.rows)
+
+    def add(self, count):
+        """
+        Account ``count`` rows done by a batch.
+
+        :param count: Number of rows of the batch
+        :type count: ``int``
+        """
+        self.rows += count
+
+    def wait(self):
+        """
+        Wait before the next batch, nothing is done before the first one.
+        """
+        if not self.rows:
+            return
+        delay = self.sleep
+        if self.max_rate:
+            elapsed = self.clock() - self.start
+            delay = max(delay, self.rows / float(self.max_rate) - elapsed)
+        if delay > 0:
+            self.sleeper(delay)
@@ -0,0 +1,98 @@
+"""
+Validation of imported records in a pool of processes, used by ``import``
+with ``--workers``.
+
+Forms are validated by workers and the parent process only creates valid
+instances, so CPU bound ``clean`` methods run on several cores. Functions
+are module-level to be pickled by :mod:`multiprocessing`.
+"""
+from collections import deque
+from itertools import islice
+from multiprocessing import Pool
+
+from django.db import connections
+
+#: Record validator by site and model's label, built once by worker
+_CACHE = {}
+
+
+def init_worker():
+    """
+    Set up Django in a spawned worker. Parent's connections are closed
+    before the pool is made, so a forked worker opens its own at its
+    first query.
+    """
+    import django
+    from django.apps import apps
+    if not apps.ready:  # pragma: no cover
+        django.setup()
+
+
+def validate_records(label, records, instances, site_name=None):
+    """
+    Validate ``records`` with the add form of model named ``label``, or its
+    change form for records with an existing instance.
+
+    :param label: Model's label as ``'app_label.ModelName'``
+    :type label: ``str``
+
+    :param records: Records of values by field's name
+    :type records: ``list`` of ``dict``
+
+    :param instances: Existing instance or ``None`` for each record
+    :type instances: ``list``
+
+    :param site_name: Name of admin site of model
+    :type site_name: ``str``
+
+    :returns: Results of ``Command._validate_record`` in order of
+              ``records``
+    :rtype: ``list``
+    """
+    if (site_name, label) not in _CACHE:
+        from admin_cli.management.commands.cli import Command
+        from admin_cli.registry import get_index
+        modeladmin = get_index(site_name).get_modeladmin(label)
+        _CACHE[site_name, label] = Command()._get_record_validator(modeladmin)
+    validate = _CACHE[site_name, label]
+    return [validate(record, instance)
+            for record, instance in zip(records, instances)]
+
+
+def iter_validated(label, chunks, workers, site_name=None):
+    """
+    Validate chunks of records in a pool of ``workers`` processes and
+    yield records with their result, in their original order. Only a few
+    chunks per worker are pending at once, so input isn't loaded at once.
+
+    :param chunks: Lists of records and of their existing instance
+    :type chunks: iterator of ``tuple``
+
+    :param site_name: Name of admin site of model
+    :type site_name: ``str``
+
+    :returns: Records and results of :func:`validate_records`
+    :rtype: iterator of ``tuple``
+    """
+    chunks = iter(chunks)
+    # Forked workers must not share the sockets of parent's connections,
+    # closing ignores in-memory SQLite databases, which are copied by fork
+    connections.close_all()
+    pool = Pool(workers, initializer=init_worker)
+    try:
+        pending = deque()
+        for records, instances in islice(chunks, workers * 2):
+            pending.append((records, pool.apply_async(
+                validate_records, (label, records, instances, site_name))))
+        while pending:
+            records, result = pending.popleft()
+            results = result.get()
+            for next_records, instances in islice(chunks, 1):
+                pending.append((next_records, pool.apply_async(
+                    validate_records,
+                    (label, next_records, instances, site_name))))
+            for record, validated in zip(records, results):
+                yield record, validated
+    finally:
+        pool.terminate()
+        pool.join()
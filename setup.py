@@ -29,9 +29,11 @@ setup(
         'Programming Language :: Python :: 3.3',
         'Programming Language :: Python :: 3.4',
         'Framework :: Django',
+        'Framework :: Django :: 1.8',
+        'Framework :: Django :: 1.9',
     ],
     packages=find_packages(exclude=['tests.runtests.main']),
     include_package_data=True,
     test_suite='tests.runtests.main',
-    install_requires=[],
+    install_requires=['Django>=1.8,<1.10'],
 )
@@ -0,0 +1,270 @@
+#!/usr/bin/env python
+"""
+Time ``cli`` actions on ``testapp`` models seeded with more and more rows
+in a SQLite database, and compare times with a baseline. ::
+
+    python tests/benchmark.py [--sizes 1000,100000] [--output results.json]
+                              [--baseline baseline.json] [--save-baseline]
+
+Listings run in a child process, their output is read through a pipe.
+Other actions run in transactions rolled back, so every size and
+repetition works on the same rows. The best time of ``--repeat`` runs is
+kept. Exit status is 1 if an action is slower than baseline by more than
+``--tolerance``.
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import sqlite3
+import subprocess
+import platform
+import tempfile
+import argparse
+from collections import OrderedDict
+
+DEFAULT_SIZES = (1000, 100000, 1000000)
+SEED_BATCH_SIZE = 10000
+#: Differences below this number of seconds are noise
+MIN_DIFFERENCE = 0.01
+
+
+def get_actions(size, input_path):
+    """
+    Get the actions timed with ``size`` rows, as names and arguments of
+    ``call_command('cli', ...)``. Writes come last, as they're the slowest.
+    """
+    return [
+        ('list page', ('testmodel', 'list'),
+         {'limit': 100, 'filter': ['field2__gte=%i' % (size // 2)]}),
+        ('count', ('testmodel', 'count'),
+         {'group_by': ['field1'], 'sum': ['field2']}),
+        ('describe', ('testmodel', 'describe'), {}),
+        ('add', ('charmodel', 'add'), {'field': ['field=BENCH']}),
+        ('import', ('charmodel', 'import'), {'input': input_path}),
+        ('update', ('testmodel', 'update'),
+         {'field': ['field2=F(field2)+1'], 'noinput': True}),
+        ('delete', ('testmodel', 'delete'),
+         {'filter': ['field2__lt=%i' % (size // 10)], 'noinput': True}),
+    ]
+
+
+def get_piped_actions():
+    """
+    Get the listings timed while their output is read from a pipe, as
+    names, arguments of ``call_command('cli', ...)`` and number of lines
+    read before closing the pipe, ``None`` to read all.
+    """
+    return [
+        ('list', ('testmodel', 'list'), {'output_format': 'csv'}, None),
+        ('list foreign key', ('foreignkeymodel', 'list'),
+         {'field': ['id', 'field'], 'output_format': 'csv'}, None),
+        ('list many-to-many', ('manytomanymodel', 'list'),
+         {'field': ['id', 'field'], 'output_format': 'csv'}, None),
+        ('list head', ('testmodel', 'list'), {'output_format': 'csv'}, 10),
+    ]
+
+
+def setup(database):
+    import runtests  # Configures settings
+    from django.conf import settings
+    settings.DATABASES['default']['NAME'] = database
+    import django
+    from django.core.management import call_command
+    django.setup()
+    call_command('migrate', verbosity=0, interactive=False)
+    from django.contrib import admin
+    admin.autodiscover()
+
+
+def seed(size):
+    """
+    Add rows to models until they have ``size`` rows.
+    """
+    from testapp import models
+    from django.db import transaction
+    start = models.TestModel.objects.count()
+    for offset in range(start, size, SEED_BATCH_SIZE):
+        stop = min(offset + SEED_BATCH_SIZE, size)
+        with transaction.atomic():
+            models.CharModel.objects.bulk_create([
+                models.CharModel(id=i + 1, field='C%i' % i)
+                for i in range(offset, stop)])
+            models.TestModel.objects.bulk_create([
+                models.TestModel(id=i + 1, field1='F%i' % (i % 100),
+                                 field2=i, no_verbose=i % 7)
+                for i in range(offset, stop)])
+            models.ForeignKeyModel.objects.bulk_create([
+                models.ForeignKeyModel(id=i + 1, field_id=i + 1)
+                for i in range(offset, stop)])
+            models.ManyToManyModel.objects.bulk_create([
+                models.ManyToManyModel(id=i + 1)
+                for i in range(offset, stop)])
+            through = models.ManyToManyModel.field.through
+            through.objects.bulk_create([
+                through(manytomanymodel_id=i + 1, charmodel_id=pk)
+                for i in range(offset, stop)
+                for pk in set([i + 1, (i * 7) % stop + 1])])
+
+
+def write_input(path, count=1000):
+    with open(path, 'w') as input_file:
+        for i in range(count):
+            input_file.write(json.dumps({'field': 'I%i' % i}) + '\n')
+
+
+def time_action(args, kwargs, repeat):
+    """
+    Get the best time of ``repeat`` runs of an action, each one rolled back.
+    """
+    from django.core.management import call_command
+    from django.db import transaction
+    best = None
+    with open(os.devnull, 'w') as devnull:
+        for i in range(repeat):
+            with transaction.atomic():
+                start = time.time()
+                call_command('cli', *args, stdout=devnull, stderr=devnull,
+                             force=True, **kwargs)
+                elapsed = time.time() - start
+                transaction.set_rollback(True)
+            best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def time_piped_action(database, args, kwargs, lines, repeat):
+    """
+    Get the best time of ``repeat`` runs of an action in a child process,
+    its output being read from a pipe as by ``| head -n lines``.
+    """
+    command = [sys.executable, os.path.abspath(__file__), '--child',
+               json.dumps([database, args, kwargs])]
+    best = None
+    for i in range(repeat):
+        process = subprocess.Popen(command, stdout=subprocess.PIPE,
+                                   stderr=subprocess.PIPE)
+        if lines is None:
+            while process.stdout.read(65536):
+                pass
+        else:
+            for j in range(lines):
+                process.stdout.readline()
+        process.stdout.close()
+        errors = process.stderr.read().decode('utf-8')
+        if process.wait():
+            raise RuntimeError(errors)
+        elapsed = float(errors.split()[-1])
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def run_child(database, args, kwargs):
+    """
+    Run an action writing to standard output, and its time to standard
+    error.
+    """
+    setup(database)
+    from django.core.management import call_command
+    start = time.time()
+    call_command('cli', *args, stdout=sys.stdout, **kwargs)
+    elapsed = time.time() - start
+    sys.stderr.write('%f\n' % elapsed)
+    sys.stderr.flush()
+    # Standard output may be closed, don't flush it again at exit
+    os._exit(0)
+
+
+def compare(results, baseline, tolerance):
+    """
+    Write times of ``results`` with their change from ``baseline``.
+
+    :returns: Number of actions slower than baseline beyond ``tolerance``
+    :rtype: ``int``
+    """
+    regressions = 0
+    row_template = '{:<10}{:<20}{:>10}{:>10}{:>9}  {}\n'
+    sys.stdout.write(row_template.format('Rows', 'Action', 'Time (s)',
+                                         'Baseline', 'Change', ''))
+    for size, timings in sorted(results.items(), key=lambda i: int(i[0])):
+        for name, elapsed in timings.items():
+            base = baseline.get(size, {}).get(name)
+            change, status = '', ''
+            if base:
+                change = '%+.0f%%' % ((elapsed / base - 1) * 100)
+                if elapsed > base * (1 + tolerance) and \
+                        elapsed - base > MIN_DIFFERENCE:
+                    status = 'REGRESSION'
+                    regressions += 1
+            sys.stdout.write(row_template.format(
+                size, name, '%.3f' % elapsed,
+                '' if base is None else '%.3f' % base, change, status))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('::')[0])
+    parser.add_argument('--sizes', type=str, default=None,
+                        help="Numbers of rows, separated by commas.")
+    parser.add_argument('--repeat', type=int, default=3,
+                        help="Runs of each action, the best is kept.")
+    parser.add_argument('--output', type=str, default=None,
+                        help="JSON file to write results.")
+    parser.add_argument('--baseline', type=str, default=None,
+                        help="JSON file of results to compare with.")
+    parser.add_argument('--save-baseline', action='store_true',
+                        help="Write results as baseline, made by first run \
+                        if baseline doesn't exist.")
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help="Slowdown from baseline allowed, 0.25 is 25%%.")
+    parser.add_argument('--child', type=str, default=None,
+                        help=argparse.SUPPRESS)
+    opts = parser.parse_args()
+    if opts.child:
+        run_child(*json.loads(opts.child))
+    sizes = [int(s) for s in opts.sizes.split(',')] if opts.sizes \
+        else DEFAULT_SIZES
+    tmpdir = tempfile.mkdtemp(prefix='admin_cli_benchmark')
+    try:
+        database = os.path.join(tmpdir, 'db.sqlite3')
+        setup(database)
+        input_path = os.path.join(tmpdir, 'input.jsonl')
+        write_input(input_path)
+        results = OrderedDict()
+        for size in sorted(sizes):
+            sys.stderr.write('Seeding %i rows\n' % size)
+            seed(size)
+            timings = results[str(size)] = OrderedDict()
+            for name, args, kwargs, lines in get_piped_actions():
+                timings[name] = time_piped_action(database, args, kwargs,
+                                                  lines, opts.repeat)
+            for name, args, kwargs in get_actions(size, input_path):
+                timings[name] = time_action(args, kwargs, opts.repeat)
+    finally:
+        shutil.rmtree(tmpdir)
+    import django
+    report = {
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'results': results,
+    }
+    if opts.output:
+        with open(opts.output, 'w') as output:
+            json.dump(report, output, indent=2)
+    baseline = {}
+    # First run makes the baseline
+    save_baseline = opts.save_baseline or \
+        (opts.baseline and not os.path.exists(opts.baseline))
+    if opts.baseline and not save_baseline:
+        with open(opts.baseline) as baseline_file:
+            baseline = json.load(baseline_file)['results']
+    regressions = compare(results, baseline, opts.tolerance)
+    if opts.baseline and save_baseline:
+        with open(opts.baseline, 'w') as baseline_file:
+            json.dump(report, baseline_file, indent=2)
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == '__main__':
+    main()
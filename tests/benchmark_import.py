@@ -0,0 +1,49 @@
+#!/usr/bin/env python
+"""
+Time the import of ``cli`` command and the creation of its parser, as made
+by ``manage.py help cli`` and autocompletion, with more and more models
+registered in admin. ::
+
+    python tests/benchmark_import.py [COUNT ...]
+"""
+import sys
+import time
+import subprocess
+
+DEFAULT_COUNTS = (0, 100, 400, 1600)
+
+
+def child(count):
+    import runtests  # Configures settings
+    import django
+    django.setup()
+    from django.contrib import admin
+    from django.db import models
+    admin.autodiscover()
+    for i in range(count):
+        model = type('BenchModel%i' % i, (models.Model,), {
+            '__module__': 'testapp.models',
+            'field': models.CharField(max_length=10),
+        })
+        admin.site.register(model)
+    start = time.time()
+    from admin_cli.management.commands.cli import Command
+    Command().create_parser('manage.py', 'cli')
+    sys.stdout.write('%f' % (time.time() - start))
+
+
+def main(counts):
+    sys.stdout.write('{:10}{:>12}\n'.format('Models', 'Import (ms)'))
+    for count in counts:
+        # Each count needs a new interpreter, as modules are cached
+        output = subprocess.check_output([sys.executable, __file__,
+                                          '--child', str(count)])
+        sys.stdout.write('{:<10}{:>12.1f}\n'.format(count,
+                                                    float(output) * 1000))
+
+
+if __name__ == '__main__':
+    if sys.argv[1:2] == ['--child']:
+        child(int(sys.argv[2]))
+    else:
+        main([int(c) for c in sys.argv[1:]] or DEFAULT_COUNTS)
@@ -1,18 +1,39 @@
 import os
-from mock import patch
+import sys
+import json
+import errno
+import signal
+import pstats
+import shutil
+import tempfile
+import subprocess
+from datetime import datetime
+from mock import patch, Mock
 try:
     from StringIO import StringIO
 except ImportError: # Py3
     from io import StringIO
 
-from django.test import TestCase
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.db import connection, connections, transaction, DatabaseError, IntegrityError
+from django.db.models.query import QuerySet
 from django.core.management import call_command
 from django.core.management.base import CommandError
 from django.conf import settings as se
+from django.contrib.admin import AdminSite
 from django.utils.timezone import now
 from django.utils.dateformat import format as strftime
 
-from admin_cli.management.commands.cli import Command
+from admin_cli.management.commands.cli import Command, ModelChoices, get_false_request
+from admin_cli import settings as cli_settings
+from admin_cli.throttle import Throttle
+from admin_cli.profiling import Profiler
+from admin_cli.shell import Shell
+from admin_cli.registry import RegistryIndex, RegistryError, get_index
+from admin_cli.introspection import get_indexes, get_unindexed_fields, \
+    estimate_row_count, get_table_stats, format_size, TableStats, \
+    PostgreSQLStats
 from testapp import models
 
 
@@ -106,21 +127,423 @@ class ListFieldTest(TestCase):
 
     def test_str(self):
         call_command('cli', 'testmodel', 'list', field=['__str__'], stdout=self.stdout)
+        self.assertEqual('Test model           \nFOO 42               \n', self.stdout.getvalue())
 
     def test_unicode(self):
         call_command('cli', 'testmodel', 'list', field=['__unicode__'], stdout=self.stdout)
+        self.assertEqual('Test model           \nFOO 42               \n', self.stdout.getvalue())
 
     def test_model_method(self):
         call_command('cli', 'testmodel', 'list', field=['get_double'], stdout=self.stdout)
+        self.assertEqual('Get_double           \n84                   \n', self.stdout.getvalue())
 
     def test_modeladmin_method_without_description(self):
         call_command('cli', 'testmodel', 'list', field=['method_without_description'], stdout=self.stdout)
+        self.assertEqual('Method_without_description\n42                   \n', self.stdout.getvalue())
 
     def test_modeladmin_method_with_description(self):
         call_command('cli', 'testmodel', 'list', field=['method_with_description'], stdout=self.stdout)
+        self.assertEqual('Desc foo             \n42                   \n', self.stdout.getvalue())
 
     def test_undefined_field(self):
         call_command('cli', 'testmodel', 'list', field=['bad_field'], stdout=self.stdout)
+        self.assertEqual('Bad_field            \nN/A                  \n', self.stdout.getvalue())
+
+    def test_fields(self):
+        call_command('cli', 'testmodel', 'list', field=['id', 'field1', 'field2'], stdout=self.stdout)
+        pk = models.TestModel.objects.get().pk
+        self.assertEqual('Id                   Field #1   Field #2             \n'
+                         '%-20i FOO        42                   \n' % pk, self.stdout.getvalue())
+
+    def test_fields_and_method(self):
+        call_command('cli', 'testmodel', 'list', field=['field1', 'get_double'], stdout=self.stdout)
+        self.assertEqual('Field #1   Get_double           \nFOO        84                   \n', self.stdout.getvalue())
+
+    def test_foreign_key(self):
+        obj = models.ForeignKeyModel.objects.create(field=models.CharModel.objects.create(field='FOO'))
+        call_command('cli', 'foreignkeymodel', 'list', field=['id', 'field'], stdout=self.stdout)
+        self.assertEqual('Id                   Field                \n'
+                         '%-20i CharModel object     \n' % obj.pk, self.stdout.getvalue())
+
+    def test_many_to_many(self):
+        obj = models.ManyToManyModel.objects.create()
+        obj.field.add(models.CharModel.objects.create(field='FOO'))
+        call_command('cli', 'manytomanymodel', 'list', field=['id', 'field'], stdout=self.stdout)
+        self.assertEqual('Id                   Field                \n'
+                         '%-20i CharModel object     \n' % obj.pk, self.stdout.getvalue())
+
+
+class ListProjectionTest(TestCase):
+    def setUp(self):
+        self.stdout = StringIO()
+        models.TestModel.objects.create(field1='FOO', field2=42, no_verbose=6)
+
+    def test_values(self):
+        with CaptureQueriesContext(connection) as queries:
+            call_command('cli', 'testmodel', 'list', field=['id', 'field1'], stdout=self.stdout)
+        self.assertNotIn('no_verbose', queries[0]['sql'])
+        self.stdout.seek(0)
+        self.assertIn('FOO', self.stdout.readlines()[1])
+
+    def test_date_values(self):
+        date = now().date()
+        models.DateModel.objects.create(field=date)
+        call_command('cli', 'datemodel', 'list', field=['field'], stdout=self.stdout)
+        self.stdout.seek(0)
+        self.assertIn(strftime(date, se.SHORT_DATE_FORMAT), self.stdout.readlines()[1])
+
+    def test_only(self):
+        fk = models.CharModel.objects.create(field='FOO')
+        models.ForeignKeyModel.objects.create(field=fk)
+        with CaptureQueriesContext(connection) as queries:
+            call_command('cli', 'foreignkeymodel', 'list', field=['field'], stdout=self.stdout)
+        self.assertEqual(1, len(queries))
+        self.stdout.seek(0)
+        self.assertIn('CharModel object', self.stdout.readlines()[1])
+
+    def test_method(self):
+        with CaptureQueriesContext(connection) as queries:
+            call_command('cli', 'testmodel', 'list', field=['field1', 'get_double'], stdout=self.stdout)
+        self.assertIn('no_verbose', queries[0]['sql'])
+        self.stdout.seek(0)
+        self.assertIn('84', self.stdout.readlines()[1])
+
+
+class ListFormatTest(TestCase):
+    def setUp(self):
+        self.stdout = StringIO()
+        models.TestModel.objects.create(field1='FOO', field2=42, no_verbose=6)
+
+    def test_jsonl(self):
+        call_command('cli', 'testmodel', 'list', field=['field1', 'field2', 'get_double'], output_format='jsonl', stdout=self.stdout)
+        self.stdout.seek(0)
+        lines = self.stdout.readlines()
+        self.assertEqual(1, len(lines))
+        self.assertEqual({'field1': 'FOO', 'field2': 42, 'get_double': 84}, json.loads(lines[0]))
+
+    def test_jsonl_date(self):
+        date = now().date()
+        models.DateModel.objects.create(field=date)
+        call_command('cli', 'datemodel', 'list', field=['field'], output_format='jsonl', stdout=self.stdout)
+        self.stdout.seek(0)
+        self.assertEqual({'field': date.isoformat()}, json.loads(self.stdout.read()))
+
+    def test_jsonl_file(self):
+        models.FileModel.objects.create(field='foo.txt')
+        call_command('cli', 'filemodel', 'list', field=['field'], output_format='jsonl', stdout=self.stdout)
+        self.assertEqual({'field': 'foo.txt'}, json.loads(self.stdout.getvalue()))
+
+    def test_jsonl_datetime(self):
+        value = now().replace(microsecond=123456)
+        models.DateTimeModel.objects.create(field=value)
+        call_command('cli', 'datetimemodel', 'list', field=['field'], output_format='jsonl', stdout=self.stdout)
+        self.assertEqual({'field': value.isoformat()}, json.loads(self.stdout.getvalue()))
+
+    def test_jsonl_relations(self):
+        fk = models.CharModel.objects.create(field='FOO')
+        models.ForeignKeyModel.objects.create(field=fk)
+        models.ManyToManyModel.objects.create().field.add(fk)
+        call_command('cli', 'foreignkeymodel', 'list', field=['field'], output_format='jsonl', stdout=self.stdout)
+        call_command('cli', 'manytomanymodel', 'list', field=['field'], output_format='jsonl', stdout=self.stdout)
+        self.stdout.seek(0)
+        lines = self.stdout.readlines()
+        self.assertEqual({'field': str(fk)}, json.loads(lines[0]))
+        self.assertEqual({'field': [str(fk)]}, json.loads(lines[1]))
+
+    def test_csv(self):
+        models.TestModel.objects.create(field1='BAR,BAZ', field2=1, no_verbose=6)
+        call_command('cli', 'testmodel', 'list', field=['field1', 'field2'], order=['field2'], output_format='csv', stdout=self.stdout)
+        self.stdout.seek(0)
+        self.assertEqual(['field1,field2\n', '"BAR,BAZ",1\n', 'FOO,42\n'], self.stdout.readlines())
+
+    def test_tsv(self):
+        call_command('cli', 'testmodel', 'list', field=['field1', 'field2'], output_format='tsv', stdout=self.stdout)
+        self.stdout.seek(0)
+        self.assertEqual(['field1\tfield2\n', 'FOO\t42\n'], self.stdout.readlines())
+
+
+class ListBufferTest(TestCase):
+    def setUp(self):
+        self.stdout = StringIO()
+        for i in range(10):
+            models.CharModel.objects.create(field='FOO%i' % i)
+
+    def test_buffered(self):
+        with patch.object(self.stdout, 'write', wraps=self.stdout.write) as write:
+            call_command('cli', 'charmodel', 'list', stdout=self.stdout)
+        self.assertEqual(1, write.call_count)
+        self.stdout.seek(0)
+        self.assertEqual(11, len(self.stdout.readlines()))
+
+    def test_buffer_size(self):
+        with patch.object(self.stdout, 'write', wraps=self.stdout.write) as write:
+            call_command('cli', 'charmodel', 'list', buffer_size=0, stdout=self.stdout)
+        self.assertEqual(11, write.call_count)
+
+    def test_broken_pipe(self):
+        error = IOError(errno.EPIPE, 'Broken pipe')
+        with patch.object(self.stdout, 'write', side_effect=error) as write:
+            call_command('cli', 'charmodel', 'list', buffer_size=0, chunk_size=2, stdout=self.stdout)
+        self.assertEqual(1, write.call_count)
+
+    def test_other_io_error(self):
+        error = IOError(errno.ENOSPC, 'No space left on device')
+        with patch.object(self.stdout, 'write', side_effect=error):
+            with self.assertRaises(IOError):
+                call_command('cli', 'charmodel', 'list', stdout=self.stdout)
+
+    def test_pipe(self):
+        read_fd, write_fd = os.pipe()
+        with os.fdopen(write_fd, 'w') as stdout:
+            call_command('cli', 'charmodel', 'list', stdout=stdout)
+        with os.fdopen(read_fd) as pipe:
+            lines = pipe.readlines()
+        self.assertEqual(11, len(lines))
+        self.assertEqual('FOO9', lines[-1].split()[1])
+
+    def test_sigterm(self):
+        rows = []
+
+        def write_row(writer, values):
+            rows.append(values)
+            writer.stream.write(' '.join(values))
+            if len(rows) == 3:
+                os.kill(os.getpid(), signal.SIGTERM)
+        with patch('admin_cli.output.TableWriter.write_row', write_row):
+            with self.assertRaises(SystemExit) as context:
+                call_command('cli', 'charmodel', 'list', stdout=self.stdout)
+        self.assertEqual(128 + signal.SIGTERM, context.exception.code)
+        # Buffered rows are written before exiting
+        self.assertEqual(4, len(self.stdout.getvalue().splitlines()))
+        self.assertEqual(signal.SIG_DFL, signal.getsignal(signal.SIGTERM))
+
+
+class ListPageTest(TestCase):
+    def setUp(self):
+        self.stdout = StringIO()
+        for field in ('FOO2', 'FOO1', 'FOO3', 'FOO1', 'FOO5'):
+            models.CharModel.objects.create(field=field)
+
+    def _list_page(self, **kwargs):
+        stdout, stderr = StringIO(), StringIO()
+        with CaptureQueriesContext(connection) as queries:
+            call_command('cli', 'charmodel', 'list', stdout=stdout, stderr=stderr, **kwargs)
+        self.assertNotIn('OFFSET', queries[0]['sql'])
+        stdout.seek(0)
+        stderr.seek(0)
+        rows = [l.split()[1] for l in stdout.readlines()[1:]]
+        cursor = stderr.read().strip()
+        return rows, (json.loads(cursor.split(' ', 3)[-1].strip("'")) if cursor else None)
+
+    def test_limit(self):
+        rows, cursor = self._list_page(limit=2)
+        self.assertEqual(['FOO2', 'FOO1'], rows)
+        self.assertEqual([2], cursor)
+
+    def test_pages(self):
+        rows, cursor = self._list_page(limit=2, order=['field'])
+        self.assertEqual(['FOO1', 'FOO1'], rows)
+        rows, cursor = self._list_page(limit=2, order=['field'], after=json.dumps(cursor))
+        self.assertEqual(['FOO2', 'FOO3'], rows)
+        rows, cursor = self._list_page(limit=2, order=['field'], after=json.dumps(cursor))
+        self.assertEqual(['FOO5'], rows)
+        self.assertIsNone(cursor)
+
+    def test_revert_order_pages(self):
+        rows, cursor = self._list_page(limit=3, order=['~field'])
+        self.assertEqual(['FOO5', 'FOO3', 'FOO2'], rows)
+        rows, cursor = self._list_page(limit=3, order=['~field'], after=json.dumps(cursor))
+        self.assertEqual(['FOO1', 'FOO1'], rows)
+
+    def test_instance_pages(self):
+        rows, cursor = self._list_page(limit=2, field=['id', '__str__'])
+        self.assertEqual(['CharModel', 'CharModel'], rows)
+        self.assertEqual([2], cursor)
+        rows, cursor = self._list_page(limit=2, field=['id', '__str__'], after='2')
+        self.assertEqual([4], cursor)
+
+    def test_bad_cursor(self):
+        with self.assertRaises(CommandError):
+            self._list_page(order=['field'], after='2')
+
+    def test_bad_order(self):
+        with self.assertRaises(CommandError):
+            self._list_page(limit=2, order=['get_double'])
+
+    def test_nullable_order(self):
+        field = models.CharModel._meta.get_field('field')
+        with patch.object(field, 'null', True):
+            with self.assertRaises(CommandError):
+                self._list_page(limit=2, order=['field'])
+
+    def test_datetime_pages(self):
+        base = now().replace(microsecond=0)
+        objs = [models.DateTimeModel.objects.create(field=base.replace(microsecond=m))
+                for m in (123456, 123457, 654321)]
+        rows, after = [], None
+        for i in range(len(objs) + 1):
+            stdout, stderr = StringIO(), StringIO()
+            call_command('cli', 'datetimemodel', 'list', field=['id'], order=['field'], limit=1,
+                         after=after, stdout=stdout, stderr=stderr)
+            rows += [int(l) for l in stdout.getvalue().splitlines()[1:]]
+            if not stderr.getvalue():
+                break
+            after = stderr.getvalue().strip().split(' ', 3)[-1].strip("'")
+            if i == 0:
+                self.assertEqual([objs[0].field.isoformat(), objs[0].pk], json.loads(after))
+        self.assertEqual([obj.pk for obj in objs], rows)
+
+
+class ListChunkTest(TestCase):
+    def setUp(self):
+        self.stdout = StringIO()
+        for i in range(10):
+            models.CharModel.objects.create(field='FOO%i' % i)
+
+    def test_stream(self):
+        with CaptureQueriesContext(connection) as context:
+            call_command('cli', 'charmodel', 'list', field=['field'], chunk_size=3, stdout=self.stdout)
+        # Pages of 3, 3, 3 and 1 rows, each one after the last row of previous
+        self.assertEqual(4, len(context.captured_queries))
+        for query in context.captured_queries:
+            self.assertIn('LIMIT 3', query['sql'])
+        self.stdout.seek(0)
+        self.assertEqual(['Field'] + ['FOO%i' % i for i in range(10)], [l.strip() for l in self.stdout.readlines()])
+
+    def test_stream_order(self):
+        call_command('cli', 'charmodel', 'list', field=['field'], order=['~field'], chunk_size=4, stdout=self.stdout)
+        self.stdout.seek(0)
+        self.assertEqual(['FOO%i' % i for i in range(9, -1, -1)], [l.strip() for l in self.stdout.readlines()[1:]])
+
+    def test_stream_limit(self):
+        with CaptureQueriesContext(connection) as context:
+            call_command('cli', 'charmodel', 'list', field=['field'], chunk_size=3, limit=4, stdout=self.stdout,
+                         stderr=StringIO())
+        self.assertIn('LIMIT 1', context.captured_queries[-1]['sql'])
+        self.stdout.seek(0)
+        self.assertEqual(['FOO%i' % i for i in range(4)], [l.strip() for l in self.stdout.readlines()[1:]])
+
+    def test_stream_unpageable(self):
+        for obj in models.CharModel.objects.all():
+            models.ForeignKeyModel.objects.create(field=obj)
+        # Values of related fields aren't in rows to select next page
+        with CaptureQueriesContext(connection) as context:
+            call_command('cli', 'foreignkeymodel', 'list', order=['field__field'], chunk_size=3, stdout=self.stdout)
+        self.assertEqual(1, len(context.captured_queries))
+        self.stdout.seek(0)
+        self.assertEqual(11, len(self.stdout.readlines()))
+
+    @patch.object(models.CharModel._meta, 'ordering', ['-field'])
+    def test_stream_foreign_key(self):
+        for obj in models.CharModel.objects.all():
+            models.ForeignKeyModel.objects.create(field=obj)
+        # Pages follow the column, not the default ordering of related model
+        with CaptureQueriesContext(connection) as context:
+            call_command('cli', 'foreignkeymodel', 'list', field=['id'], order=['field'], chunk_size=3, stdout=self.stdout)
+        self.assertEqual(4, len(context.captured_queries))
+        self.assertNotIn('testapp_charmodel', context.captured_queries[0]['sql'])
+        self.stdout.seek(0)
+        pks = [int(line) for line in self.stdout.readlines()[1:]]
+        self.assertEqual(list(models.ForeignKeyModel.objects.order_by('field_id').values_list('pk', flat=True)), pks)
+
+    @patch.object(QuerySet, '_fetch_all', autospec=True, side_effect=QuerySet._fetch_all)
+    def test_no_stream(self, fetch_all):
+        call_command('cli', 'charmodel', 'list', chunk_size=0, stdout=self.stdout)
+        self.assertTrue(fetch_all.called)
+        self.stdout.seek(0)
+        self.assertEqual(11, len(self.stdout.readlines()))
+
+
+class ListRelatedTest(TestCase):
+    def setUp(self):
+        self.stdout = StringIO()
+        self.stderr = StringIO()
+        for i in range(5):
+            fk = models.CharModel.objects.create(field='FOO%i' % i)
+            ins = models.ManyToManyModel.objects.create()
+            ins.field.add(fk)
+            models.ForeignKeyModel.objects.create(field=fk)
+
+    def test_foreignkey(self):
+        with self.assertNumQueries(1):
+            call_command('cli', 'foreignkeymodel', 'list', field=['id', 'field'], stdout=self.stdout)
+
+    def test_manytomany(self):
+        with self.assertNumQueries(2):
+            call_command('cli', 'manytomanymodel', 'list', field=['id', 'field'], stdout=self.stdout)
+        self.stdout.seek(0)
+        self.assertIn('CharModel object', self.stdout.readlines()[1])
+
+    def test_manytomany_chunks(self):
+        # Two pages and their prefetch
+        with self.assertNumQueries(4):
+            call_command('cli', 'manytomanymodel', 'list', field=['field'], chunk_size=3, stdout=self.stdout)
+
+    def test_manytomany_no_stream(self):
+        with self.assertNumQueries(2):
+            call_command('cli', 'manytomanymodel', 'list', field=['field'], chunk_size=0, stdout=self.stdout)
+
+    def test_show_queries(self):
+        call_command('cli', 'foreignkeymodel', 'list', field=['field'], show_queries=True, stdout=self.stdout, stderr=self.stderr)
+        self.stderr.seek(0)
+        self.assertEqual('1 queries', self.stderr.read().strip())
+
+    def test_show_queries_without_debug_cursor(self):
+        logged = len(connection.queries_log)
+        call_command('cli', 'manytomanymodel', 'list', field=['field'], show_queries=True, chunk_size=2,
+                     stdout=self.stdout, stderr=self.stderr)
+        self.assertEqual(logged, len(connection.queries_log))
+        self.assertEqual('6 queries', self.stderr.getvalue().strip())
+
+    def test_show_queries_profile(self):
+        call_command('cli', 'manytomanymodel', 'list', field=['field'], show_queries=True, profile=True, chunk_size=2,
+                     stdout=self.stdout, stderr=self.stderr)
+        self.assertIn('6 queries', self.stderr.getvalue())
+        self.assertRegexpMatches(self.stderr.getvalue(), r'SQL queries +6 ')
+        self.assertNotIn('make_cursor', vars(connections['default']))
+
+
+class CountTest(TestCase):
+    def setUp(self):
+        self.stdout = StringIO()
+        models.TestModel.objects.create(field1='FOO', field2=1, no_verbose=6)
+        models.TestModel.objects.create(field1='FOO', field2=3, no_verbose=6)
+        models.TestModel.objects.create(field1='BAR', field2=5, no_verbose=6)
+
+    def _count(self, **kwargs):
+        call_command('cli', 'testmodel', 'count', output_format='jsonl', stdout=self.stdout, **kwargs)
+        self.stdout.seek(0)
+        return [json.loads(l) for l in self.stdout.readlines()]
+
+    def test_count(self):
+        self.assertEqual([{'count': 3}], self._count())
+
+    def test_filter(self):
+        self.assertEqual([{'count': 2}], self._count(filter=['field1=FOO']))
+
+    def test_group_by(self):
+        with self.assertNumQueries(1):
+            rows = self._count(group_by=['field1'], sum=['field2'], max=['field2'])
+        self.assertEqual([
+            {'field1': 'BAR', 'count': 1, 'field2__sum': 5, 'field2__max': 5},
+            {'field1': 'FOO', 'count': 2, 'field2__sum': 4, 'field2__max': 3},
+        ], rows)
+
+    def test_aggregates(self):
+        rows = self._count(avg=['field2'], min=['field2'])
+        self.assertEqual([{'count': 3, 'field2__avg': 3, 'field2__min': 1}], rows)
+
+    def test_table(self):
+        call_command('cli', 'testmodel', 'count', group_by=['field1'], stdout=self.stdout)
+        self.stdout.seek(0)
+        lines = self.stdout.readlines()
+        self.assertEqual(3, len(lines))
+        self.assertEqual(['BAR', '1'], lines[1].split())
+
+    @patch('admin_cli.settings.USERS', {os.getlogin(): 'W'})
+    def test_no_access(self, *args):
+        with self.assertRaises(CommandError):
+            call_command('cli', 'testmodel', 'count', stdout=self.stdout)
 
 
 class DeleteTest(TestCase):
@@ -186,6 +609,110 @@ class DeleteFilterTest(TestCase):
         self.assertEqual(0, models.CharModel.objects.count())
 
 
+class BulkDeleteTest(TestCase):
+    def setUp(self):
+        self.stdout = StringIO()
+        for i in range(5):
+            fk = models.CharModel.objects.create(field='FOO%i' % i)
+            models.ForeignKeyModel.objects.create(field=fk)
+
+    def test_batches(self):
+        call_command('cli', 'charmodel', 'delete', noinput=True, batch_size=2, stdout=self.stdout)
+        self.assertEqual(0, models.CharModel.objects.count())
+        self.stdout.seek(0)
+        self.assertEqual(["Deleted 5 'testapp.CharModel'\n",
+                          "Deleted 5 'testapp.ForeignKeyModel'\n"],
+                         self.stdout.readlines())
+
+    def test_filter(self):
+        call_command('cli', 'charmodel', 'delete', filter=['field__gte=FOO3'], noinput=True, batch_size=1, stdout=self.stdout)
+        self.assertEqual(3, models.CharModel.objects.count())
+        self.assertEqual(3, models.ForeignKeyModel.objects.count())
+
+    def test_no_match(self):
+        with self.assertNumQueries(1):
+            call_command('cli', 'charmodel', 'delete', filter=['field=BAR'], noinput=True, stdout=self.stdout)
+        self.assertEqual('', self.stdout.getvalue())
+
+
+class ThrottleTest(TestCase):
+    def setUp(self):
+        self.now = 0
+        self.sleeps = []
+
+    def _sleep(self, delay):
+        self.sleeps.append(delay)
+        self.now += delay
+
+    def _throttle(self, sleep=0, max_rate=None):
+        return Throttle(sleep, max_rate, clock=lambda: self.now, sleeper=self._sleep)
+
+    def test_no_wait(self):
+        throttle = self._throttle()
+        self.assertFalse(throttle.enabled)
+        throttle.add(10)
+        throttle.wait()
+        self.assertEqual([], self.sleeps)
+
+    def test_sleep(self):
+        throttle = self._throttle(sleep=2)
+        throttle.wait()
+        self.assertEqual([], self.sleeps)
+        throttle.add(10)
+        throttle.wait()
+        self.assertEqual([2], self.sleeps)
+
+    def test_max_rate(self):
+        throttle = self._throttle(max_rate=10)
+        throttle.add(100)
+        self.now = 4
+        throttle.wait()
+        self.assertEqual([6], self.sleeps)
+        self.assertEqual(10, throttle.rate)
+
+    def test_max_rate_not_reached(self):
+        throttle = self._throttle(max_rate=10)
+        throttle.add(10)
+        self.now = 2
+        throttle.wait()
+        self.assertEqual([], self.sleeps)
+
+
+class ThrottledCommandTest(TestCase):
+    def setUp(self):
+        self.stdout = StringIO()
+        self.stderr = StringIO()
+        for i in range(5):
+            models.CharModel.objects.create(field='FOO%i' % i)
+
+    @patch('admin_cli.throttle.time.sleep')
+    def test_delete(self, sleep):
+        call_command('cli', 'charmodel', 'delete', noinput=True, batch_size=2, sleep_between_batches=0.5,
+                     stdout=self.stdout, stderr=self.stderr)
+        self.assertEqual(0, models.CharModel.objects.count())
+        self.assertEqual(2, sleep.call_count)
+        self.stderr.seek(0)
+        lines = self.stderr.readlines()
+        self.assertEqual(3, len(lines))
+        self.assertTrue(lines[-1].startswith('Deleted 5 rows ('))
+        self.assertIn('rows/s', lines[-1])
+
+    @patch('admin_cli.throttle.time.sleep')
+    def test_update(self, sleep):
+        call_command('cli', 'charmodel', 'update', field=['field=BAR'], noinput=True, batch_size=2,
+                     sleep_between_batches=0.5, stdout=self.stdout, stderr=self.stderr)
+        self.assertEqual(5, models.CharModel.objects.filter(field='BAR').count())
+        self.assertEqual(2, sleep.call_count)
+        self.stderr.seek(0)
+        self.assertTrue(self.stderr.readlines()[-1].startswith('Updated 5 rows ('))
+
+    @patch('admin_cli.throttle.time.sleep')
+    def test_no_throttle(self, sleep):
+        call_command('cli', 'charmodel', 'delete', noinput=True, batch_size=2, stdout=self.stdout, stderr=self.stderr)
+        self.assertFalse(sleep.called)
+        self.assertEqual('', self.stderr.getvalue())
+
+
 class AddTest(TestCase):
     def setUp(self):
         self.stdout = StringIO()
@@ -256,6 +783,9 @@ class AddTest(TestCase):
 
     def test_file(self):
         call_command('cli', 'filemodel', 'add', file=['field=/etc/hosts'], stdout=self.stdout)
+        obj = models.FileModel.objects.get()
+        # Uploaded in MEDIA_ROOT
+        obj.field.delete(save=False)
 
     def test_unfound_file(self):
         with self.assertRaises(CommandError):
@@ -353,6 +883,664 @@ class UpdateFilterTest(TestCase):
         self.assertEqual('FOO', models.CharModel.objects.get().field)
 
 
+class BulkUpdateTest(TestCase):
+    def setUp(self):
+        self.stdout = StringIO()
+        self.stderr = StringIO()
+        for i in range(5):
+            models.CharModel.objects.create(field='FOO')
+
+    def test_single_statement(self):
+        with self.assertNumQueries(1):
+            call_command('cli', 'charmodel', 'update', field=['field=BAR'], noinput=True, batch_size=0, stdout=self.stdout)
+        self.assertEqual(5, models.CharModel.objects.filter(field='BAR').count())
+        self.assertEqual("Updated 5 'testapp.CharModel'\n", self.stdout.getvalue())
+
+    def test_batches(self):
+        # By batch: select keys and update, then select no key
+        with self.assertNumQueries(7):
+            call_command('cli', 'charmodel', 'update', field=['field=BAR'], filter=['field=FOO'], noinput=True,
+                         batch_size=2, stdout=self.stdout)
+        self.assertEqual(5, models.CharModel.objects.filter(field='BAR').count())
+        self.assertEqual("Updated 5 'testapp.CharModel'\n", self.stdout.getvalue())
+
+    def test_echo(self):
+        call_command('cli', 'charmodel', 'update', field=['field=BAR'], noinput=True, verbosity=2,
+                     stdout=self.stdout, stderr=self.stderr)
+        self.stdout.seek(0)
+        self.assertEqual(6, len(self.stdout.readlines()))
+
+    def test_unknow_field(self):
+        with self.assertRaises(CommandError) as context:
+            call_command('cli', 'charmodel', 'update', field=['bad_field=BAR'], noinput=True,
+                         stdout=self.stdout, stderr=self.stderr)
+        self.assertEqual(5, models.CharModel.objects.filter(field='FOO').count())
+        self.assertIn('FieldDoesNotExist', str(context.exception))
+        self.assertIn("0 'testapp.CharModel' already updated", str(context.exception))
+        self.assertEqual('', self.stdout.getvalue())
+
+    def test_failed_batch(self):
+        update = QuerySet.update
+        calls = []
+
+        def fail_second(queryset, **kwargs):
+            calls.append(kwargs)
+            if len(calls) == 2:
+                raise DatabaseError('Lock wait timeout')
+            return update(queryset, **kwargs)
+        with patch.object(QuerySet, 'update', fail_second):
+            with self.assertRaises(CommandError) as context:
+                call_command('cli', 'charmodel', 'update', field=['field=BAR'], noinput=True,
+                             batch_size=2, stdout=self.stdout)
+        self.assertIn('Lock wait timeout', str(context.exception))
+        self.assertIn("2 'testapp.CharModel' already updated", str(context.exception))
+        self.assertEqual(2, models.CharModel.objects.filter(field='BAR').count())
+
+
+class UpdateExpressionTest(TestCase):
+    def setUp(self):
+        self.stdout = StringIO()
+        self.obj = models.TestModel.objects.create(field1='foo', field2=42, no_verbose=6)
+
+    def _update(self, *fields):
+        with self.assertNumQueries(1):
+            call_command('cli', 'testmodel', 'update', field=list(fields), noinput=True, batch_size=0, stdout=self.stdout)
+        return models.TestModel.objects.get()
+
+    def test_f(self):
+        self.assertEqual(43, self._update('field2=F(field2)+1').field2)
+
+    def test_f_string(self):
+        self.assertEqual(84, self._update("field2=F('field2') * 2").field2)
+
+    def test_other_field(self):
+        obj = self._update('field2=F(no_verbose) - 1', 'no_verbose=F(field2)')
+        self.assertEqual(5, obj.field2)
+        self.assertEqual(42, obj.no_verbose)
+
+    def test_functions(self):
+        self.assertEqual('FOO-6', self._update("field1=Concat(Upper(field1), '-', no_verbose)").field1)
+
+    def test_now(self):
+        models.DateTimeModel.objects.create(field=now().replace(year=2000))
+        call_command('cli', 'datetimemodel', 'update', field=['field=Now()'], noinput=True, stdout=self.stdout)
+        self.assertEqual(now().year, models.DateTimeModel.objects.get().field.year)
+
+    def test_literal(self):
+        self.assertEqual('F(x', self._update('field1=F(x').field1)
+        self.assertEqual('2+3', self._update('field1=2+3').field1)
+        self.assertEqual('a=b', self._update('field1=a=b').field1)
+
+    def test_unsafe(self):
+        with self.assertRaises(CommandError):
+            call_command('cli', 'testmodel', 'update', field=["field2=F(field2)+__import__('os').getpid()"],
+                         noinput=True, stdout=self.stdout)
+        with self.assertRaises(CommandError):
+            call_command('cli', 'testmodel', 'update', field=["field2=Upper(field1.lower)"],
+                         noinput=True, stdout=self.stdout)
+        self.assertEqual(42, models.TestModel.objects.get().field2)
+
+
+class ValidatedUpdateTest(TestCase):
+    def setUp(self):
+        self.stdout = StringIO()
+        self.stderr = StringIO()
+
+    def _update(self, model, *fields, **kwargs):
+        call_command('cli', model, 'update', field=list(fields), noinput=True, validate=True,
+                     stdout=self.stdout, stderr=self.stderr, **kwargs)
+        self.stdout.seek(0)
+        return self.stdout.readlines()
+
+    def test_valid(self):
+        for i in range(5):
+            models.IntegerModel.objects.create(field=i)
+        lines = self._update('integermodel', 'field=42', batch_size=2)
+        self.assertEqual(["Updated 5 'testapp.IntegerModel'\n"], lines)
+        self.assertEqual(5, models.IntegerModel.objects.filter(field=42).count())
+
+    def test_invalid(self):
+        models.IntegerModel.objects.create(field=1)
+        lines = self._update('integermodel', 'field=FOO')
+        self.assertEqual(["Updated 0 'testapp.IntegerModel'\n", "Invalid 1 'testapp.IntegerModel'\n"], lines)
+        self.assertIn('field: ', self.stderr.getvalue())
+        self.assertEqual(1, models.IntegerModel.objects.get().field)
+
+    def test_filter(self):
+        models.CharModel.objects.create(field='FOO')
+        models.CharModel.objects.create(field='BAR')
+        self._update('charmodel', 'field=BAZ', filter=['field=FOO'])
+        self.assertEqual(['BAR', 'BAZ'], sorted(models.CharModel.objects.values_list('field', flat=True)))
+
+    def test_too_long(self):
+        models.CharModel.objects.create(field='FOO')
+        self._update('charmodel', 'field=FOOBARBAZQUX')
+        self.assertEqual('FOO', models.CharModel.objects.get().field)
+
+    def test_manytomany(self):
+        obj1 = models.CharModel.objects.create(field='FOO')
+        obj2 = models.CharModel.objects.create(field='BAR')
+        models.ManyToManyModel.objects.create().field.add(obj1)
+        self._update('manytomanymodel', 'field=%i,%i' % (obj1.id, obj2.id))
+        self.assertEqual(2, models.ManyToManyModel.objects.get().field.count())
+
+    def test_foreign_key(self):
+        obj1 = models.CharModel.objects.create(field='FOO')
+        obj2 = models.CharModel.objects.create(field='BAR')
+        for i in range(3):
+            models.ForeignKeyModel.objects.create(field=obj1)
+        self._update('foreignkeymodel', 'field=%i' % obj2.id)
+        self.assertEqual([obj2.id] * 3, list(models.ForeignKeyModel.objects.values_list('field', flat=True)))
+
+    def test_datetime(self):
+        value = datetime(2020, 1, 2, 3, 4, 5)
+        for i in range(3):
+            models.DateTimeModel.objects.create(field=now())
+        self._update('datetimemodel', 'field_0=2020-01-02', 'field_1=03:04:05')
+        self.assertEqual([value] * 3, list(models.DateTimeModel.objects.values_list('field', flat=True)))
+
+    def test_one_update_by_batch(self):
+        for i in range(4):
+            models.IntegerModel.objects.create(field=i)
+        with CaptureQueriesContext(connection) as context:
+            self._update('integermodel', 'field=42', batch_size=2)
+        updates = [q for q in context.captured_queries if 'UPDATE' in q['sql']]
+        self.assertEqual(2, len(updates))
+        self.assertEqual(4, models.IntegerModel.objects.filter(field=42).count())
+
+    def test_expression(self):
+        with self.assertRaises(CommandError):
+            self._update('integermodel', 'field=F(field)+1')
+
+    def test_confirm(self):
+        with self.assertRaises(CommandError):
+            call_command('cli', 'integermodel', 'update', field=['field=1'], validate=True, stdout=self.stdout)
+
+
+class ImportTest(TestCase):
+    def setUp(self):
+        self.stdout = StringIO()
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def _write(self, name, content):
+        path = os.path.join(self.tmpdir, name)
+        with open(path, 'w') as fd:
+            fd.write(content)
+        return path
+
+    def _import(self, model, path, **kwargs):
+        call_command('cli', model, 'import', input=path, stdout=self.stdout, **kwargs)
+        self.stdout.seek(0)
+        return self.stdout.readlines()
+
+    def test_csv(self):
+        path = self._write('data.csv', 'field\nFOO\nBAR\n')
+        lines = self._import('charmodel', path)
+        self.assertEqual(["Created 2 'testapp.CharModel'\n"], lines)
+        self.assertEqual(['BAR', 'FOO'], sorted(models.CharModel.objects.values_list('field', flat=True)))
+
+    def test_add_form(self):
+        path = self._write('data.csv', 'form_field\nFooBar\n')
+        self._import('testmodel', path)
+        obj = models.TestModel.objects.get()
+        self.assertEqual(('FooBar', 6), (obj.field1, obj.field2))
+
+    def test_tsv(self):
+        path = self._write('data.tsv', 'field\nFOO\n')
+        self._import('charmodel', path)
+        self.assertEqual('FOO', models.CharModel.objects.get().field)
+
+    def test_jsonl(self):
+        path = self._write('data.jsonl', '{"field": 1}\n\n{"field": 2}\n')
+        self._import('integermodel', path)
+        self.assertEqual([1, 2], sorted(models.IntegerModel.objects.values_list('field', flat=True)))
+
+    def test_format(self):
+        path = self._write('data.txt', '{"field": 1}\n')
+        self._import('integermodel', path, output_format='jsonl')
+        self.assertEqual(1, models.IntegerModel.objects.get().field)
+
+    def test_unknown_format(self):
+        path = self._write('data.txt', '{"field": 1}\n')
+        with self.assertRaises(CommandError):
+            self._import('integermodel', path)
+
+    def test_missing_file(self):
+        with self.assertRaises(CommandError):
+            self._import('integermodel', os.path.join(self.tmpdir, 'none.csv'))
+
+    def test_rejects(self):
+        path = self._write('data.csv', 'field\n1\nFOO\n2\n')
+        rejects_path = os.path.join(self.tmpdir, 'rejects.csv')
+        lines = self._import('integermodel', path, rejects=rejects_path)
+        self.assertEqual(["Created 2 'testapp.IntegerModel'\n", "Rejected 1 'testapp.IntegerModel'\n"], lines)
+        with open(rejects_path) as fd:
+            rejects = fd.readlines()
+        self.assertEqual('field,errors\n', rejects[0])
+        self.assertTrue(rejects[1].startswith('FOO,field: '))
+        self.assertEqual(2, len(rejects))
+
+    def test_jsonl_rejects(self):
+        path = self._write('data.jsonl', '{"field": "FOOBARBAZQUX"}\n')
+        rejects_path = os.path.join(self.tmpdir, 'rejects.jsonl')
+        self._import('charmodel', path, rejects=rejects_path)
+        with open(rejects_path) as fd:
+            reject = json.loads(fd.read())
+        self.assertEqual('FOOBARBAZQUX', reject['field'])
+        self.assertIn('field', reject['errors'])
+        self.assertFalse(models.CharModel.objects.exists())
+
+    def test_jsonl_malformed(self):
+        path = self._write('data.jsonl', '{"field": 1}\n{"field": \n\n[2]\n{"field": 3}\n')
+        rejects_path = os.path.join(self.tmpdir, 'rejects.jsonl')
+        lines = self._import('integermodel', path, rejects=rejects_path)
+        self.assertEqual(["Created 2 'testapp.IntegerModel'\n", "Rejected 2 'testapp.IntegerModel'\n"], lines)
+        self.assertEqual([1, 3], sorted(models.IntegerModel.objects.values_list('field', flat=True)))
+        with open(rejects_path) as fd:
+            rejects = [json.loads(line) for line in fd]
+        self.assertTrue(rejects[0]['errors']['__all__'][0].startswith('Malformed line 2: '))
+        self.assertEqual(['Malformed line 4: Not an object'], rejects[1]['errors']['__all__'])
+
+    def test_integrity_error(self):
+        create_instances = Command._create_instances
+
+        def create(command, model, instances):
+            if any(obj.field == 13 for obj, many_to_many in instances):
+                raise IntegrityError('UNIQUE constraint failed')
+            return create_instances(command, model, instances)
+
+        path = self._write('data.csv', 'field\n1\n13\n2\n3\n')
+        rejects_path = os.path.join(self.tmpdir, 'rejects.csv')
+        with patch.object(Command, '_create_instances', create):
+            lines = self._import('integermodel', path, rejects=rejects_path, batch_size=3)
+        self.assertEqual(["Created 3 'testapp.IntegerModel'\n", "Rejected 1 'testapp.IntegerModel'\n"], lines)
+        self.assertEqual([1, 2, 3], sorted(models.IntegerModel.objects.values_list('field', flat=True)))
+        with open(rejects_path) as fd:
+            rejects = fd.readlines()
+        self.assertEqual('13,__all__: UNIQUE constraint failed\n', rejects[1])
+
+    def test_foreignkey(self):
+        obj = models.CharModel.objects.create(field='FOO')
+        path = self._write('data.csv', 'field\n%i\n' % obj.id)
+        self._import('foreignkeymodel', path)
+        self.assertEqual(obj, models.ForeignKeyModel.objects.get().field)
+
+    def test_manytomany(self):
+        obj1 = models.CharModel.objects.create(field='FOO')
+        obj2 = models.CharModel.objects.create(field='BAR')
+        path = self._write('data.csv', 'field\n"%i,%i"\n\n' % (obj1.id, obj2.id))
+        lines = self._import('manytomanymodel', path)
+        self.assertEqual(["Created 1 'testapp.ManyToManyModel'\n"], lines)
+        self.assertEqual(2, models.ManyToManyModel.objects.get().field.count())
+
+    def test_batches(self):
+        path = self._write('data.csv', 'field\n' + ''.join(['%i\n' % i for i in range(5)]))
+        with CaptureQueriesContext(connection) as queries:
+            self._import('integermodel', path, batch_size=2)
+        inserts = [q for q in queries.captured_queries if 'INSERT INTO' in q['sql']]
+        self.assertEqual(3, len(inserts))
+        self.assertEqual(5, models.IntegerModel.objects.count())
+
+    @patch('admin_cli.settings.USERS', {os.getlogin(): 'R'})
+    def test_no_access(self, *args):
+        path = self._write('data.csv', 'field\n1\n')
+        with self.assertRaises(CommandError):
+            self._import('integermodel', path)
+
+
+class ImportWorkersTest(TransactionTestCase):
+    """
+    Imports with workers, which can't run in TestCase's transaction.
+    """
+    def setUp(self):
+        self.stdout = StringIO()
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def _write(self, name, content):
+        path = os.path.join(self.tmpdir, name)
+        with open(path, 'w') as fd:
+            fd.write(content)
+        return path
+
+    def _import(self, model, path, **kwargs):
+        call_command('cli', model, 'import', input=path, stdout=self.stdout, **kwargs)
+        self.stdout.seek(0)
+        return self.stdout.readlines()
+
+    def test_workers(self):
+        path = self._write('data.csv', 'field\n' + ''.join(['%i\n' % i for i in range(7)]) + 'FOO\n7\n')
+        rejects_path = os.path.join(self.tmpdir, 'rejects.csv')
+        lines = self._import('integermodel', path, rejects=rejects_path, workers=2, batch_size=2)
+        self.assertEqual(["Created 8 'testapp.IntegerModel'\n", "Rejected 1 'testapp.IntegerModel'\n"], lines)
+        self.assertEqual(list(range(8)), list(models.IntegerModel.objects.order_by('pk').values_list('field', flat=True)))
+        with open(rejects_path) as fd:
+            self.assertTrue(fd.readlines()[1].startswith('FOO,'))
+
+    def test_workers_connections(self):
+        path = self._write('data.csv', 'field\n1\n')
+        with patch('admin_cli.workers.connections.close_all') as close_all:
+            self._import('integermodel', path, workers=2)
+        close_all.assert_called_once_with()
+        self.assertEqual(1, models.IntegerModel.objects.get().field)
+
+    def test_workers_malformed(self):
+        path = self._write('data.jsonl', '{"field": 1}\n{\n{"field": 2}\n')
+        rejects_path = os.path.join(self.tmpdir, 'rejects.jsonl')
+        lines = self._import('integermodel', path, rejects=rejects_path, workers=2, batch_size=1)
+        self.assertEqual(["Created 2 'testapp.IntegerModel'\n", "Rejected 1 'testapp.IntegerModel'\n"], lines)
+        with open(rejects_path) as fd:
+            self.assertIn('Malformed line 2: ', fd.read())
+
+    def test_workers_related(self):
+        obj1 = models.CharModel.objects.create(field='FOO')
+        obj2 = models.CharModel.objects.create(field='BAR')
+        path = self._write('data.csv', 'field\n"%i,%i"\n' % (obj1.id, obj2.id))
+        self._import('manytomanymodel', path, workers=2)
+        self.assertEqual(2, models.ManyToManyModel.objects.get().field.count())
+
+    def test_workers_add_form(self):
+        path = self._write('data.jsonl', '{"form_field": "FooBar"}\n')
+        self._import('testmodel', path, workers=2)
+        self.assertEqual('FooBar', models.TestModel.objects.get().field1)
+
+    def test_workers_upsert(self):
+        models.TestModel.objects.create(field1='FOO', field2=1, no_verbose=1)
+        path = self._write('data.jsonl', '{"field1": "FOO", "field2": 5, "no_verbose": 0}\n{"form_field": "BAZ"}\n')
+        lines = self._import('testmodel', path, upsert_on='field1', workers=2)
+        self.assertEqual(["Created 1 'testapp.TestModel'\n", "Updated 1 'testapp.TestModel'\n"], lines)
+        self.assertEqual([('BAZ', 3), ('FOO', 5)], list(models.TestModel.objects.order_by('field1').values_list('field1', 'field2')))
+
+    def test_workers_in_transaction(self):
+        path = self._write('data.csv', 'field\n1\n')
+        with transaction.atomic():
+            with self.assertRaises(CommandError):
+                self._import('integermodel', path, workers=2)
+            models.IntegerModel.objects.create(field=2)
+        self.assertEqual(2, models.IntegerModel.objects.get().field)
+
+    def test_workers_file_database(self):
+        # In-memory databases ignore closing, unlike files
+        script = '''
+import os, sys
+sys.path.insert(0, %r)
+import runtests
+from django.conf import settings
+settings.DATABASES['default']['NAME'] = %r
+import django
+django.setup()
+from django.core.management import call_command
+call_command('migrate', verbosity=0, interactive=False)
+call_command('cli', 'integermodel', 'import', input=%r, workers=2)
+with open(%r, 'w') as fd:
+    fd.write('integermodel import --input %s --workers 2\\n')
+from django.core.management.base import CommandError
+try:
+    call_command('cli', 'shell', script=fd.name, atomic=True)
+except CommandError as err:
+    sys.stderr.write('CommandError: %%s\\n' %% err)
+'''
+        path = self._write('data.csv', 'field\n1\n2\n')
+        script_path = os.path.join(self.tmpdir, 'script.txt')
+        database = os.path.join(self.tmpdir, 'db.sqlite3')
+        here = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        process = subprocess.Popen([sys.executable, '-c', script % (here, database, path, script_path, path)],
+                                   stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        stdout, stderr = process.communicate()
+        self.assertIn(b"Created 2 'testapp.IntegerModel'", stdout)
+        self.assertIn(b"Error: Can't use --workers in a transaction", stderr)
+        self.assertIn(b"FAILED", stderr)
+        self.assertIn(b"CommandError: 1 line(s) failed", stderr)
+        self.assertNotIn(b'Traceback', stderr)
+
+
+class UpsertTest(TestCase):
+    def setUp(self):
+        self.stdout = StringIO()
+        self.tmpdir = tempfile.mkdtemp()
+        models.TestModel.objects.create(field1='FOO', field2=1, no_verbose=1)
+        models.TestModel.objects.create(field1='BAR', field2=2, no_verbose=2)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def _import(self, content, **kwargs):
+        path = os.path.join(self.tmpdir, 'data.jsonl')
+        with open(path, 'w') as fd:
+            fd.write(content)
+        call_command('cli', 'testmodel', 'import', input=path, upsert_on='field1', stdout=self.stdout, **kwargs)
+        self.stdout.seek(0)
+        return self.stdout.readlines()
+
+    def _values(self):
+        return list(models.TestModel.objects.order_by('field1').values_list('field1', 'field2'))
+
+    def test_import(self):
+        lines = self._import('{"field1": "FOO", "field2": 5, "no_verbose": 0}\n{"form_field": "BAZ"}\n')
+        self.assertEqual(["Created 1 'testapp.TestModel'\n", "Updated 1 'testapp.TestModel'\n"], lines)
+        self.assertEqual([('BAR', 2), ('BAZ', 3), ('FOO', 5)], self._values())
+
+    def test_lookup_by_batch(self):
+        content = ''.join(['{"field1": "%s", "field2": %i, "no_verbose": 0, "form_field": "%s"}\n' % (name, i, name)
+                           for i, name in enumerate(['FOO', 'BAR', 'BAZ', 'QUX'])])
+        with CaptureQueriesContext(connection) as queries:
+            lines = self._import(content, batch_size=2)
+        lookups = [q for q in queries.captured_queries if '"field1" IN' in q['sql']]
+        self.assertEqual(2, len(lookups))
+        self.assertEqual(["Created 2 'testapp.TestModel'\n", "Updated 2 'testapp.TestModel'\n"], lines)
+        self.assertEqual([('BAR', 1), ('BAZ', 3), ('FOO', 0), ('QUX', 3)], self._values())
+
+    def test_duplicate(self):
+        lines = self._import('{"field1": "FOO", "field2": 5, "no_verbose": 0}\n'
+                             '{"field1": "FOO", "field2": 6, "no_verbose": 0}\n')
+        self.assertEqual(["Created 0 'testapp.TestModel'\n", "Updated 1 'testapp.TestModel'\n",
+                          "Rejected 1 'testapp.TestModel'\n"], lines)
+        self.assertEqual([('BAR', 2), ('FOO', 5)], self._values())
+
+    def test_invalid(self):
+        lines = self._import('{"field1": "FOO", "field2": "BAR", "no_verbose": 0}\n')
+        self.assertEqual(["Created 0 'testapp.TestModel'\n", "Rejected 1 'testapp.TestModel'\n"], lines)
+        self.assertEqual([('BAR', 2), ('FOO', 1)], self._values())
+
+    def test_query_params(self):
+        models.TestModel.objects.bulk_create([
+            models.TestModel(field1='F%i' % i, field2=i, no_verbose=i) for i in range(600)])
+        content = ''.join(['{"field1": "F%i", "field2": %i, "no_verbose": 1}\n' % (i, i + 1) for i in range(600)])
+        with CaptureQueriesContext(connection) as context:
+            lines = self._import(content, batch_size=600)
+        self.assertEqual(["Created 0 'testapp.TestModel'\n", "Updated 600 'testapp.TestModel'\n"], lines)
+        updates = [q['sql'] for q in context.captured_queries if 'UPDATE' in q['sql']]
+        # Each object has 3 fields, so 7 parameters, SQLite allows 999
+        self.assertEqual(5, len(updates))
+        for sql in updates:
+            self.assertLessEqual(sql.count('%s'), 999)
+        self.assertEqual(600, models.TestModel.objects.filter(no_verbose=1).exclude(field1='FOO').count())
+
+    def test_unknown_field(self):
+        with self.assertRaises(CommandError):
+            call_command('cli', 'testmodel', 'import', upsert_on='foo', stdout=self.stdout)
+
+    def test_manytomany_field(self):
+        with self.assertRaises(CommandError):
+            call_command('cli', 'manytomanymodel', 'import', upsert_on='field', stdout=self.stdout)
+
+    def test_add_existing(self):
+        call_command('cli', 'testmodel', 'add', field=['field1=FOO', 'field2=3', 'no_verbose=1'],
+                     upsert_on='field1', stdout=self.stdout)
+        self.assertEqual("Updated 'FOO 3'\n", self.stdout.getvalue())
+        self.assertEqual([('BAR', 2), ('FOO', 3)], self._values())
+
+    def test_add_new(self):
+        call_command('cli', 'testmodel', 'add', field=['form_field=BAZ'], upsert_on='field1', stdout=self.stdout)
+        self.assertEqual("Created 'BAZ 3'\n", self.stdout.getvalue())
+
+
+class ExplainTest(TestCase):
+    def setUp(self):
+        self.stdout = StringIO()
+        models.TestModel.objects.create(field1='FOO', field2=1, no_verbose=6)
+
+    def _explain(self, action, **kwargs):
+        call_command('cli', 'testmodel', action, explain=True, noinput=True,
+                     stdout=self.stdout, **kwargs)
+        return self.stdout.getvalue()
+
+    def test_list(self):
+        output = self._explain('list', filter=['field1=FOO'])
+        self.assertIn('SELECT', output)
+        self.assertIn('= %s\nPARAMS:\n', output)
+        self.assertIn("'FOO'\nPLAN:", output)
+        self.assertIn('PLAN:', output)
+
+    def test_count(self):
+        output = self._explain('count', sum=['field2'])
+        self.assertIn('COUNT(', output)
+        self.assertIn('SUM(', output)
+
+    def test_count_group_by(self):
+        output = self._explain('count', group_by=['field1'])
+        self.assertIn('GROUP BY', output)
+
+    def test_update(self):
+        with CaptureQueriesContext(connection) as queries:
+            output = self._explain('update', field=['field2=F(field2)+1'])
+        self.assertIn('UPDATE', output)
+        self.assertIn('SELECTION:', output)
+        self.assertIn('+ %s)\nPARAMS:\n1\nSELECTION:', output)
+        self.assertFalse([q for q in queries if 'UPDATE' in q['sql']])
+        self.assertEqual(1, models.TestModel.objects.get().field2)
+
+    def test_update_string(self):
+        output = self._explain('update', field=["field1=BAR'; DROP TABLE x"], filter=['field1=FOO'])
+        self.assertIn('"field1" = %s', output)
+        self.assertIn("SQL:\nUPDATE", output)
+        self.assertIn('''BAR'; DROP TABLE x", ''', output)
+        self.assertEqual('FOO', models.TestModel.objects.get().field1)
+
+    def test_delete(self):
+        output = self._explain('delete')
+        self.assertIn('DELETE FROM', output)
+        self.assertEqual(1, models.TestModel.objects.count())
+
+    def test_analyze_not_supported(self):
+        with self.assertRaises(CommandError):
+            self._explain('list', analyze=True)
+
+    def test_not_explainable(self):
+        with self.assertRaises(CommandError):
+            self._explain('describe')
+
+
+class IntrospectionTest(TestCase):
+    def test_get_indexes(self):
+        indexes = get_indexes(models.ForeignKeyModel)
+        self.assertIn((['id'], 'primary key'),
+                      [(columns, kind) for name, columns, kind in indexes])
+        self.assertIn((['field_id'], 'index'),
+                      [(columns, kind) for name, columns, kind in indexes])
+
+    def test_unindexed_fields(self):
+        self.assertEqual(['field1', 'field2'], get_unindexed_fields(
+            models.TestModel, ['pk', 'field1__icontains', '-field2', 'field1']))
+
+    def test_declared_indexes(self):
+        with self.assertNumQueries(0):
+            fields = get_unindexed_fields(models.ForeignKeyModel,
+                                          ['id', 'field__field'])
+        self.assertEqual([], fields)
+
+    def test_no_statistics(self):
+        with self.assertNumQueries(0):
+            self.assertIsNone(estimate_row_count(models.TestModel))
+
+    def test_table_stats(self):
+        models.CharModel.objects.create(field='FOO')
+        rows, estimated, table_size, indexes_size = \
+            get_table_stats(models.CharModel)
+        self.assertEqual((1, False), (rows, estimated))
+        # From dbstat, if SQLite has it
+        self.assertTrue(table_size is None or table_size > 0)
+
+    @patch('admin_cli.introspection.STATS_BACKENDS', {})
+    def test_no_backend(self):
+        self.assertEqual((0, False, None, None),
+                         get_table_stats(models.CharModel))
+
+    @patch.object(TableStats, 'estimate_rows', Mock(return_value=42))
+    def test_estimated(self):
+        with patch('admin_cli.introspection.STATS_BACKENDS', {}):
+            self.assertEqual((42, True), get_table_stats(models.CharModel)[:2])
+            self.assertEqual((0, False), get_table_stats(
+                models.CharModel, exact=True)[:2])
+
+    def test_postgresql(self):
+        backend = PostgreSQLStats(connection)
+        with patch.object(backend, '_fetchone', Mock(return_value=(-1.0,))):
+            self.assertIsNone(backend.estimate_rows('testapp_charmodel'))
+        with patch.object(backend, '_fetchone', Mock(return_value=(1e6,))):
+            self.assertEqual(1000000,
+                             backend.estimate_rows('testapp_charmodel'))
+
+    def test_format_size(self):
+        self.assertEqual(['N/A', '512 B', '4.0 KiB', '1.5 GiB'], [
+            format_size(s) for s in (None, 512, 4096, 3 * 2 ** 29)])
+
+
+@patch('admin_cli.management.commands.cli.estimate_row_count',
+       Mock(return_value=10 ** 6))
+class ScanCheckTest(TestCase):
+    def setUp(self):
+        self.stdout = StringIO()
+        models.TestModel.objects.create(field1='FOO', field2=1, no_verbose=6)
+
+    def test_unindexed_filter(self):
+        with self.assertRaises(CommandError) as context:
+            call_command('cli', 'testmodel', 'list', filter=['field1=FOO'],
+                         stdout=self.stdout)
+        self.assertIn("'field1'", str(context.exception))
+        self.assertIn('--force', str(context.exception))
+
+    def test_unindexed_order(self):
+        with self.assertRaises(CommandError):
+            call_command('cli', 'testmodel', 'delete', order=['~field2'],
+                         noinput=True, stdout=self.stdout)
+        self.assertEqual(1, models.TestModel.objects.count())
+
+    def test_indexed(self):
+        call_command('cli', 'testmodel', 'list', filter=['id=1'],
+                     stdout=self.stdout)
+        self.assertIn('FOO', self.stdout.getvalue())
+
+    @patch('admin_cli.settings.USERS', {os.getlogin(): 'R'})
+    def test_access_first(self):
+        with patch('admin_cli.management.commands.cli.Command._check_scan') as check_scan:
+            with self.assertRaises(CommandError) as context:
+                call_command('cli', 'testmodel', 'delete', filter=['field1=FOO'],
+                             noinput=True, stdout=self.stdout)
+        self.assertIn("hasn't 'W' access", str(context.exception))
+        self.assertFalse(check_scan.called)
+
+    def test_force(self):
+        call_command('cli', 'testmodel', 'list', filter=['field1=FOO'],
+                     force=True, stdout=self.stdout)
+        self.assertIn('FOO', self.stdout.getvalue())
+
+    @patch('admin_cli.settings.SCAN_THRESHOLD', 10 ** 7)
+    def test_small_table(self):
+        call_command('cli', 'testmodel', 'count', filter=['field1=FOO'],
+                     stdout=self.stdout)
+
+    @patch('admin_cli.settings.SCAN_THRESHOLD', 0)
+    def test_disabled(self):
+        call_command('cli', 'testmodel', 'count', filter=['field1=FOO'],
+                     stdout=self.stdout)
+
+
 class DescribeTest(TestCase):
     def setUp(self):
         self.stdout = StringIO()
@@ -384,12 +1572,265 @@ class DescribeTest(TestCase):
     def test_testmodel(self):
         call_command('cli', 'testmodel', 'describe', stdout=self.stdout)
 
+    def test_stats(self):
+        models.CharModel.objects.create(field='FOO')
+        call_command('cli', 'charmodel', 'describe', stdout=self.stdout)
+        lines = self.stdout.getvalue().splitlines()
+        self.assertEqual(['Rows', '1'], lines[lines.index('STATS:') + 1].split())
+
+    @patch('admin_cli.introspection.SQLiteStats.estimate_rows',
+           Mock(return_value=42))
+    def test_stats_estimated(self):
+        call_command('cli', 'charmodel', 'describe', stdout=self.stdout)
+        self.assertIn('~42 (estimated)', self.stdout.getvalue())
+        self.stdout = StringIO()
+        call_command('cli', 'charmodel', 'describe', exact=True,
+                     stdout=self.stdout)
+        lines = self.stdout.getvalue().splitlines()
+        self.assertEqual(['Rows', '0'], lines[lines.index('STATS:') + 1].split())
+
+    def test_indexes(self):
+        call_command('cli', 'foreignkeymodel', 'describe', stdout=self.stdout)
+        lines = self.stdout.getvalue().splitlines()
+        indexes = [l.split()[1:] for l in lines[lines.index('INDEXES:') + 2:]]
+        self.assertIn(['id', 'primary', 'key'], indexes)
+        self.assertIn(['field_id', 'index'], indexes)
+
     @patch('admin_cli.settings.USERS', {os.getlogin(): 'W'})
     def test_no_access(self, *args):
         with self.assertRaises(CommandError):
             call_command('cli', 'charmodel', 'describe', stdout=self.stdout)
 
 
+class ProfilerTest(TestCase):
+    def setUp(self):
+        self.time = 0
+        self.profiler = Profiler(clock=lambda: self.time)
+
+    def _tick(self, *args):
+        self.time += 1
+
+    def test_phase(self):
+        with self.profiler.phase('foo'):
+            self._tick()
+        with self.profiler.phase('foo'):
+            self._tick()
+        self.assertEqual({'foo': 2}, dict(self.profiler.timings))
+
+    def test_timed(self):
+        func = self.profiler.timed('foo', self._tick)
+        func()
+        func()
+        self.assertEqual({'foo': 2}, dict(self.profiler.timings))
+
+    def test_timed_iter(self):
+        def items():
+            for i in range(3):
+                self._tick()
+                yield i
+        self.assertEqual([0, 1, 2], list(self.profiler.timed_iter('foo', items())))
+        self.assertEqual({'foo': 3}, dict(self.profiler.timings))
+
+    def test_run(self):
+        with self.profiler.run(connection):
+            self._tick()
+            models.CharModel.objects.count()
+        self.assertEqual(1, self.profiler.total)
+        self.assertEqual(1, self.profiler.queries)
+
+    def test_run_without_debug_cursor(self):
+        logged = len(connection.queries_log)
+        with self.profiler.run(connection):
+            self.assertFalse(connection.queries_logged)
+            models.CharModel.objects.bulk_create([models.CharModel(field='FOO')] * 3)
+            for i in range(3):
+                models.CharModel.objects.count()
+        self.assertEqual(4, self.profiler.queries)
+        self.assertEqual(logged, len(connection.queries_log))
+        self.assertNotIn('make_cursor', vars(connections['default']))
+
+    def test_run_with_debug_cursor(self):
+        with CaptureQueriesContext(connection) as queries:
+            with self.profiler.run(connection):
+                models.CharModel.objects.count()
+        self.assertEqual(1, self.profiler.queries)
+        self.assertEqual(1, len(queries))
+
+    def test_peak_memory(self):
+        self.assertGreater(self.profiler.get_peak_memory(), 0)
+
+
+class ProfileOptionTest(TestCase):
+    def setUp(self):
+        self.stdout = StringIO()
+        self.stderr = StringIO()
+        models.CharModel.objects.create(field='FOO')
+
+    def test_list(self):
+        call_command('cli', 'charmodel', 'list', profile=True, stdout=self.stdout, stderr=self.stderr)
+        lines = self.stderr.getvalue().splitlines()
+        self.assertEqual('Profile:', lines[0])
+        names = [line[:20].strip() for line in lines[1:]]
+        self.assertEqual(['Model resolution', 'Query', 'Rendering', 'Output', 'Total', 'SQL queries', 'Peak memory'],
+                         names)
+        self.assertEqual('1', lines[-2].split()[2])
+        self.assertIn('FOO', self.stdout.getvalue())
+
+    def test_count(self):
+        call_command('cli', 'charmodel', 'count', profile=True, stdout=self.stdout, stderr=self.stderr)
+        self.assertIn('Total', self.stderr.getvalue())
+
+    def test_disabled(self):
+        call_command('cli', 'charmodel', 'list', stdout=self.stdout, stderr=self.stderr)
+        self.assertEqual('', self.stderr.getvalue())
+
+    def test_profile_out(self):
+        tmpdir = tempfile.mkdtemp()
+        try:
+            path = os.path.join(tmpdir, 'cli.prof')
+            call_command('cli', 'charmodel', 'list', profile_out=path, stdout=self.stdout, stderr=self.stderr)
+            stats = pstats.Stats(path)
+            self.assertTrue(stats.total_calls)
+        finally:
+            shutil.rmtree(tmpdir)
+        self.assertIn(path, self.stderr.getvalue())
+
+
+class ShellTest(TestCase):
+    def setUp(self):
+        self.stdout = StringIO()
+        self.stderr = StringIO()
+
+    def _shell(self, *lines):
+        call_command('cli', 'shell', stdin=StringIO('\n'.join(lines) + '\n'),
+                     stdout=self.stdout, stderr=self.stderr)
+        return self.stdout.getvalue()
+
+    def test_run(self):
+        output = self._shell('charmodel add -f field=FOO', '', "charmodel list -f field -F 'field=FOO'", 'exit')
+        self.assertEqual(["Created 'CharModel object'", 'Field', 'FOO'], [l.strip() for l in output.splitlines()])
+        self.assertEqual('', self.stderr.getvalue())
+
+    def test_end_of_input(self):
+        self._shell('charmodel add -f field=FOO')
+        self.assertEqual(1, models.CharModel.objects.count())
+
+    def test_exit(self):
+        self._shell('exit', 'charmodel add -f field=FOO')
+        self.assertFalse(models.CharModel.objects.exists())
+
+    def test_error(self):
+        output = self._shell('foomodel list', 'charmodel update -f field=FOO -F', 'charmodel', 'shell',
+                             "charmodel list -F 'field", 'charmodel count')
+        self.assertEqual(['Count', '0'], output.split())
+        self.assertEqual(5, self.stderr.getvalue().count('Error: '))
+
+    def test_help(self):
+        output = self._shell('help')
+        self.assertIn('--filter', output)
+
+    def test_action_required(self):
+        with self.assertRaises(CommandError):
+            call_command('cli', 'charmodel', stdout=self.stdout)
+
+    def test_complete(self):
+        shell = Shell(Command(), StringIO(), self.stdout, self.stderr)
+        self.assertEqual(['charmodel'], shell.completenames('charm'))
+        self.assertEqual(['count'], shell.completedefault('co', 'charmodel co', 10, 12))
+        self.assertEqual(['field='], shell.completedefault('f', 'charmodel list -F f', 17, 18))
+        self.assertEqual(['id', 'field'], shell.completedefault('', 'charmodel list -o ', 18, 18))
+        self.assertEqual([], shell.completedefault('', 'foomodel list -o ', 17, 17))
+        self.assertIn('--filter', shell.completedefault('--fi', 'charmodel list --fi', 15, 19))
+
+    def test_readline(self):
+        readline = Mock()
+        shell = Shell(Command(), Mock(isatty=lambda: True), self.stdout, self.stderr)
+        with patch.dict('sys.modules', {'readline': readline}):
+            shell.preloop()
+            shell.postloop()
+        readline.read_history_file.assert_called_once_with(cli_settings.HISTORY_FILE)
+        readline.write_history_file.assert_called_once_with(cli_settings.HISTORY_FILE)
+
+    def test_readline_not_used(self):
+        readline = Mock()
+        shell = Shell(Command(), StringIO(), self.stdout, self.stderr)
+        with patch.dict('sys.modules', {'readline': readline}):
+            shell.preloop()
+            shell.postloop()
+        self.assertFalse(readline.method_calls)
+
+    def test_readline_missing(self):
+        shell = Shell(Command(), Mock(isatty=lambda: True), self.stdout, self.stderr)
+        # Importing a module set to None raises ImportError
+        with patch.dict('sys.modules', {'readline': None}):
+            shell.preloop()
+            shell.postloop()
+        self.assertIsNone(shell.readline)
+        self.assertTrue(shell.use_rawinput)
+
+
+class ShellScriptTest(TestCase):
+    def setUp(self):
+        self.stdout = StringIO()
+        self.stderr = StringIO()
+
+    def _script(self, *lines, **kwargs):
+        call_command('cli', 'shell', script='-', stdin=StringIO('\n'.join(lines) + '\n'),
+                     stdout=self.stdout, stderr=self.stderr, **kwargs)
+        return self.stderr.getvalue().splitlines()
+
+    def test_run(self):
+        lines = self._script('# Comment', 'charmodel add -f field=FOO', '', 'charmodel add -f field=BAR')
+        self.assertEqual(2, models.CharModel.objects.count())
+        self.assertEqual(2, len(lines))
+        self.assertTrue(lines[0].startswith('Line 2: '))
+        self.assertTrue(lines[1].startswith('Line 4: '))
+        self.assertTrue(lines[1].endswith(' OK'))
+
+    def test_file(self):
+        tmpdir = tempfile.mkdtemp()
+        try:
+            path = os.path.join(tmpdir, 'script.txt')
+            with open(path, 'w') as fd:
+                fd.write('charmodel add -f field=FOO\n')
+            call_command('cli', 'shell', script=path, stdout=self.stdout, stderr=self.stderr)
+        finally:
+            shutil.rmtree(tmpdir)
+        self.assertEqual(1, models.CharModel.objects.count())
+
+    def test_missing_file(self):
+        with self.assertRaises(CommandError):
+            call_command('cli', 'shell', script='/nonexistent/script.txt', stdout=self.stdout)
+
+    def test_stop_on_error(self):
+        with self.assertRaises(CommandError):
+            self._script('charmodel add -f field=FOO', 'charmodel add -f field=FOOBARBAZQUX', 'charmodel add -f field=BAR')
+        self.assertEqual(['FOO'], list(models.CharModel.objects.values_list('field', flat=True)))
+        self.assertTrue(self.stderr.getvalue().splitlines()[-1].endswith(' FAILED'))
+
+    def test_keep_going(self):
+        with self.assertRaises(CommandError):
+            self._script('charmodel add -f field=FOO', 'charmodel add -f field=FOOBARBAZQUX', 'charmodel add -f field=BAR',
+                         keep_going=True)
+        self.assertEqual(2, models.CharModel.objects.count())
+
+    def test_atomic(self):
+        with self.assertRaises(CommandError):
+            self._script('charmodel add -f field=FOO', 'integermodel add -f field=BAR', atomic=True)
+        self.assertFalse(models.CharModel.objects.exists())
+
+    def test_atomic_keep_going(self):
+        with self.assertRaises(CommandError):
+            self._script('charmodel add -f field=FOO', 'integermodel add -f field=BAR', 'charmodel add -f field=BAR',
+                         atomic=True, keep_going=True)
+        self.assertFalse(models.CharModel.objects.exists())
+        self.assertEqual(3, len([l for l in self.stderr.getvalue().splitlines() if l.startswith('Line ')]))
+
+    def test_atomic_success(self):
+        self._script('charmodel add -f field=FOO', 'charmodel update -f field=BAR -i', atomic=True)
+        self.assertEqual('BAR', models.CharModel.objects.get().field)
+
+
 class UserHasAccessTest(TestCase):
     def setUp(self):
         self.command = Command()
@@ -427,6 +1868,23 @@ class UserHasAccessTest(TestCase):
             self.command._user_has_access('R')
 
 
+class LazyTest(TestCase):
+    def test_model_choices(self):
+        self.assertIn('charmodel', ModelChoices())
+        self.assertIn('shell', ModelChoices())
+        self.assertNotIn('foomodel', ModelChoices())
+        self.assertEqual('shell', list(ModelChoices())[-1])
+
+    def test_false_request(self):
+        self.assertIs(get_false_request(), get_false_request())
+        self.assertEqual('GET', get_false_request().method)
+
+
+OTHER_SITE = AdminSite(name='other')
+OTHER_SITE.register(models.IntegerModel)
+SITES = {'default': 'django.contrib.admin.site', 'other': OTHER_SITE}
+
+
 class CommandGetModelTest(TestCase):
     def setUp(self):
         self.command = Command()
@@ -435,6 +1893,58 @@ class CommandGetModelTest(TestCase):
         charmodel = self.command._get_model('charmodel')
         self.assertEqual(charmodel, models.CharModel)
 
+    def test_app_label(self):
+        charmodel = self.command._get_model('testapp.charmodel')
+        self.assertEqual(charmodel, models.CharModel)
+        stdout = StringIO()
+        call_command('cli', 'testapp.charmodel', 'count', stdout=stdout)
+        self.assertEqual(['Count', '0'], stdout.getvalue().split())
+
     def test_non_existing(self):
         with self.assertRaises(CommandError):
             self.command._get_model('FooModel')
+
+    def test_ambiguous(self):
+        registry = {
+            Mock(_meta=Mock(app_label='app1', model_name='foo')): None,
+            Mock(_meta=Mock(app_label='app2', model_name='foo')): None,
+        }
+        index = RegistryIndex(registry)
+        with self.assertRaises(RegistryError) as context:
+            index.get_model('foo')
+        self.assertIn('app1.foo, app2.foo', str(context.exception))
+        self.assertEqual('app2', index.get_model('app2.foo')._meta.app_label)
+
+    def test_index_cached(self):
+        self.assertIs(get_index(), get_index())
+
+    def test_index_swapped_model(self):
+        # Same number of models, but not the same ones
+        site = AdminSite()
+        site.register(models.CharModel)
+        with patch('admin_cli.settings.SITES', {'swap': site}):
+            self.assertIn('charmodel', get_index('swap'))
+            site.unregister(models.CharModel)
+            site.register(models.IntegerModel)
+            index = get_index('swap')
+        self.assertNotIn('charmodel', index)
+        self.assertIn('integermodel', index)
+
+    @patch('admin_cli.settings.SITES', SITES)
+    def test_site(self):
+        self.command.site_name = 'other'
+        self.assertEqual(models.IntegerModel, self.command._get_model('integermodel'))
+        with self.assertRaises(CommandError):
+            self.command._get_model('charmodel')
+
+    @patch('admin_cli.settings.SITES', SITES)
+    def test_site_option(self):
+        stdout = StringIO()
+        call_command('cli', 'integermodel', 'count', site='other', stdout=stdout)
+        self.assertEqual(['Count', '0'], stdout.getvalue().split())
+        with self.assertRaises(CommandError):
+            call_command('cli', 'charmodel', 'count', site='other', stdout=stdout)
+
+    def test_unknown_site(self):
+        with self.assertRaises(CommandError):
+            call_command('cli', 'charmodel', 'count', site='foo', stdout=StringIO())